@@ -3,17 +3,118 @@
 # Configureaza Flask, baza de date si rutele API
 #
 # Aceasta aplicatie demonstreaza criptarea end-to-end folosind:
-# - AES-256-CBC pentru criptarea continutului mesajelor
+# - AES-256-GCM pentru criptarea mesajelor si fisierelor
 # - RSA-2048 pentru schimbul securizat de chei
 
 import os
+import gzip
+import shutil
+import mimetypes
+from tempfile import SpooledTemporaryFile
 from datetime import timedelta
-from flask import Flask, send_from_directory
+from functools import lru_cache
+from flask import Flask, Request, jsonify, request, send_from_directory
 from flask_cors import CORS
+from sqlalchemy import event
+from flask.json.provider import JSONProvider
+from werkzeug.security import safe_join
+try:
+    # orjson: serializare JSON in Rust, mult mai rapida decat modulul json
+    import orjson
+except ImportError:  # pragma: no cover - fallback pe provider-ul implicit Flask
+    orjson = None
+try:
+    # Flask-Session + Redis: sesiuni server-side (optional, activ doar cu REDIS_URL)
+    import redis
+    from flask_session import Session
+except ImportError:  # pragma: no cover - fallback pe cookie-ul semnat Flask
+    redis = None
+    Session = None
+try:
+    # Flask-Compress: comprimare br/gzip negociata per cerere pentru raspunsurile JSON
+    from flask_compress import Compress
+except ImportError:  # pragma: no cover - raspunsuri necomprimate
+    Compress = None
 from config import Config
 from models import db
 
 
+class ORJSONProvider(JSONProvider):
+    """
+    Provider JSON pentru Flask bazat pe orjson.
+    
+    Toate raspunsurile jsonify (lista de conversatii, mesaje, cautare
+    utilizatori) trec prin response; orjson produce direct bytes compacti,
+    fara spatii, care devin corpul raspunsului fara alta conversie.
+    OPT_NON_STR_KEYS: cheile int (ex: {user_id: cheie_publica}) devin string,
+    ca la modulul json.
+    """
+    
+    # JSONProvider (spre deosebire de DefaultJSONProvider) nu defineste mimetype
+    mimetype = 'application/json'
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS).decode('utf-8')
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+    
+    def response(self, *args, **kwargs):
+        """Construieste raspunsul jsonify direct din bytes-ii orjson (fara decode/encode)."""
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            orjson.dumps(obj, default=str, option=orjson.OPT_NON_STR_KEYS),
+            mimetype=self.mimetype
+        )
+
+
+class SpooledUploadRequest(Request):
+    """
+    Request care tine fisierele uploadate in memorie pana la UPLOAD_SPOOL_MAX_SIZE.
+    
+    Implicit Werkzeug scrie pe disc (fisier temporar) orice upload peste 500KB;
+    FileService il citeste apoi inapoi pentru criptare. Cu spool in memorie,
+    fiecare byte este citit o data din retea si scris o data, criptat, pe disc.
+    """
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return SpooledTemporaryFile(max_size=Config.UPLOAD_SPOOL_MAX_SIZE, mode='rb+')
+
+
+# Extensiile fisierelor din build care merita precomprimate (text)
+PRECOMPRESSED_EXTENSIONS = ('.js', '.css', '.html', '.svg', '.json', '.map', '.txt')
+
+
+def precompress_static(static_folder):
+    """
+    Genereaza variante .gz pentru fisierele text din build-ul React.
+    
+    Build-ul este imutabil la rulare, deci comprimam o singura data
+    la pornire (nivel maxim) in loc sa comprimam la fiecare request.
+    Variantele deja generate si mai noi decat sursa sunt pastrate.
+    
+    Args:
+        static_folder: Directorul build-ului React
+    """
+    if not static_folder or not os.path.isdir(static_folder):
+        return
+    
+    for root, _, files in os.walk(static_folder):
+        for name in files:
+            if not name.endswith(PRECOMPRESSED_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            gz_path = path + '.gz'
+            try:
+                if os.path.exists(gz_path) and os.path.getmtime(gz_path) >= os.path.getmtime(path):
+                    continue
+                with open(path, 'rb') as src, gzip.open(gz_path, 'wb', compresslevel=9) as dst:
+                    shutil.copyfileobj(src, dst)
+            except OSError:
+                # Build montat read-only - servim varianta necomprimata
+                continue
+
+
 def create_app(config_class=Config):
     """
     Factory function pentru crearea aplicatiei Flask.
@@ -32,10 +133,15 @@ def create_app(config_class=Config):
     app = Flask(__name__, 
                 static_folder='../web/build',  # React build folder
                 static_url_path='')
+    app.request_class = SpooledUploadRequest
     
     # Incarcam configurarea
     app.config.from_object(config_class)
     
+    # Serializare JSON rapida daca orjson este instalat
+    if orjson is not None:
+        app.json = ORJSONProvider(app)
+    
     # Setam cheia secreta explicit pentru sesiuni
     app.secret_key = app.config.get('SECRET_KEY', 'dev-secret-key-change-in-prod')
     
@@ -48,6 +154,17 @@ def create_app(config_class=Config):
     app.config['SESSION_COOKIE_SAMESITE'] = 'Lax'
     app.config['SESSION_COOKIE_SECURE'] = False  # True in productie cu HTTPS
     
+    # Cu Redis, datele sesiunii stau pe server: cookie-ul poarta doar ID-ul
+    # sesiunii, fara deserializare si verificare itsdangerous la fiecare cerere
+    if Session is not None and app.config.get('REDIS_URL'):
+        app.config['SESSION_TYPE'] = 'redis'
+        app.config['SESSION_REDIS'] = redis.Redis.from_url(app.config['REDIS_URL'])
+        Session(app)
+    
+    # Comprimam raspunsurile JSON ale API-ului (fisierele statice sunt deja precomprimate)
+    if Compress is not None:
+        Compress(app)
+    
     # Initializam CORS pentru a permite requesturi din React
     # Acceptam toate originile in development
     CORS(app, 
@@ -59,7 +176,25 @@ def create_app(config_class=Config):
     
     # Cream tabelele daca nu exista
     with app.app_context():
+        if db.engine.dialect.name == 'sqlite':
+            @event.listens_for(db.engine, 'connect')
+            def set_sqlite_pragmas(dbapi_connection, _):
+                """Aplica SQLITE_PRAGMAS pe fiecare conexiune noua din pool."""
+                cursor = dbapi_connection.cursor()
+                for pragma in config_class.SQLITE_PRAGMAS:
+                    cursor.execute(f'PRAGMA {pragma}')
+                cursor.close()
+        
         db.create_all()
+        # create_all nu adauga indecsi noi pe tabele existente
+        from models import Message, ConversationParticipant
+        for model in (Message, ConversationParticipant):
+            for index in model.__table__.indexes:
+                index.create(db.engine, checkfirst=True)
+        
+        # Conexiunile deschise pentru DDL nu trebuie mostenite de workerii creati
+        # prin fork (gunicorn --preload): fiecare worker isi deschide propriul pool
+        db.engine.dispose()
     
     # Inregistram blueprint-urile (rutele API)
     from routes import auth_bp, chat_bp, file_bp
@@ -67,11 +202,58 @@ def create_app(config_class=Config):
     app.register_blueprint(chat_bp)
     app.register_blueprint(file_bp)
     
+    # Limitarea ratei pentru rutele de polling (daca flask-limiter este instalat)
+    from routes._rate_limit import limiter
+    if limiter is not None:
+        limiter.init_app(app)
+    
+    @app.errorhandler(429)
+    def rate_limit_exceeded(_):
+        """Raspuns JSON (ca restul API-ului) cand limita de cereri este depasita."""
+        return jsonify({'error': 'Prea multe cereri, incercati mai tarziu'}), 429
+    
+    @app.errorhandler(413)
+    def request_too_large(_):
+        """Corp peste MAX_CONTENT_LENGTH: Werkzeug il respinge inainte de a-l citi."""
+        return jsonify({'error': 'Cererea este prea mare'}), 413
+    
+    # Precomprimam build-ul React o singura data, la pornire
+    precompress_static(app.static_folder)
+    
+    @lru_cache(maxsize=2048)
+    def static_exists(path):
+        """Verifica (o singura data per cale) daca un fisier exista in build."""
+        full_path = safe_join(app.static_folder, path)
+        return full_path is not None and os.path.isfile(full_path)
+    
+    def send_static(path):
+        """
+        Serveste un fisier din build, varianta .gz daca browserul o accepta.
+        
+        Fisierele din static/ au hash in nume (imutabile) si sunt cache-uite
+        de browser; index.html este revalidat la fiecare incarcare.
+        """
+        max_age = config_class.STATIC_CACHE_MAX_AGE if path.startswith('static/') else 0
+        
+        if static_exists(path + '.gz'):
+            if 'gzip' in request.accept_encodings:
+                response = send_from_directory(
+                    app.static_folder, path + '.gz', max_age=max_age,
+                    mimetype=mimetypes.guess_type(path)[0] or 'application/octet-stream'
+                )
+                response.headers['Content-Encoding'] = 'gzip'
+            else:
+                response = send_from_directory(app.static_folder, path, max_age=max_age)
+            response.vary.add('Accept-Encoding')
+            return response
+        
+        return send_from_directory(app.static_folder, path, max_age=max_age)
+    
     # Ruta pentru servirea aplicatiei React (productie)
     @app.route('/')
     def serve_react():
         """Serveste aplicatia React din build folder."""
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_static('index.html')
     
     # Ruta catch-all pentru React Router (SPA)
     @app.route('/<path:path>')
@@ -81,10 +263,10 @@ def create_app(config_class=Config):
         Necesar pentru React Router cu browser history.
         """
         # Verificam daca e un fisier static
-        if path and os.path.exists(os.path.join(app.static_folder, path)):
-            return send_from_directory(app.static_folder, path)
+        if path and static_exists(path):
+            return send_static(path)
         # Altfel, servim index.html (React va gestiona ruta)
-        return send_from_directory(app.static_folder, 'index.html')
+        return send_static('index.html')
     
     # Endpoint pentru verificarea starii serverului
     @app.route('/api/health')
@@ -95,7 +277,7 @@ def create_app(config_class=Config):
             'service': 'SecureChat API',
             'version': '1.0.0',
             'encryption': {
-                'symmetric': 'AES-256-CBC',
+                'symmetric': 'AES-256-GCM',
                 'asymmetric': 'RSA-2048'
             }
         }
@@ -114,8 +296,13 @@ if __name__ == '__main__':
     print("SecureChat - Aplicatie de Chat cu Criptare End-to-End")
     print("=" * 60)
     print("Algoritmi de criptare:")
-    print("  - AES-256-CBC: criptare continut mesaje")
+    print("  - AES-256-GCM: criptare mesaje si fisiere")
+    print("  - AES-256-CBC: date vechi si fisiere criptate pe client")
     print("  - RSA-2048: schimb securizat de chei")
+    from services.crypto_service import CryptoService, cpu_has_aes_instructions
+    aes_ni = cpu_has_aes_instructions()
+    print(f"Backend: {CryptoService().backend.openssl_version_text()} (EVP), "
+          f"instructiuni AES: {'da' if aes_ni else 'nu' if aes_ni is False else 'necunoscut'}")
     print("=" * 60)
     print("Server pornit pe http://localhost:5000")
     print("API disponibil la http://localhost:5000/api")
@@ -23,6 +23,30 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f'sqlite:///{os.path.join(DATA_DIR, "chat.db")}'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Cache pentru SQL-ul compilat al statement-urilor (implicit 500)
+    SQLALCHEMY_ENGINE_OPTIONS = {'query_cache_size': 1200}
+    if not SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        # Server de baze de date (ex: PostgreSQL prin DATABASE_URL): pool de conexiuni
+        # comun procesului, refolosit intre cereri - fara handshake TCP+auth per cerere.
+        # pre_ping detecteaza conexiunile inchise de server, recycle le reinnoieste periodic.
+        SQLALCHEMY_ENGINE_OPTIONS.update(
+            pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+            max_overflow=int(os.environ.get('DB_POOL_MAX_OVERFLOW', 30)),
+            pool_pre_ping=True,
+            pool_recycle=1800,
+        )
+    
+    # PRAGMA-uri aplicate la fiecare conexiune SQLite noua:
+    # WAL - cititorii nu mai sunt blocati de scrieri, fara fsync la fiecare commit
+    # mmap/cache/temp_store - mai putine apeluri read() si mai putin I/O pe disc
+    SQLITE_PRAGMAS = (
+        'journal_mode=WAL',
+        'synchronous=NORMAL',
+        'mmap_size=268435456',
+        'cache_size=-64000',
+        'temp_store=MEMORY',
+        'busy_timeout=5000',
+    )
     
     # Cheie secreta pentru sesiuni Flask
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'cheie-secreta-pentru-dezvoltare-schimba-in-productie'
@@ -33,7 +57,45 @@ class Config:
     
     # Directorul pentru fisiere uploadate
     UPLOAD_FOLDER = os.path.join(DATA_DIR, 'uploads')
-    MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # Limita 16MB pentru upload
+    # Dimensiunea totala maxima a fisierelor dintr-un upload (verificata inainte de criptare)
+    MAX_UPLOAD_BYTES = int(os.environ.get('MAX_UPLOAD_BYTES', 16 * 1024 * 1024))  # 16MB implicit
+    # Limita corpului oricarei cereri (Werkzeug): upload-ul maxim plus loc pentru
+    # antetele multipart ale fiecarui fisier
+    MAX_CONTENT_LENGTH = MAX_UPLOAD_BYTES + 1024 * 1024
+    # Fisierele uploadate pana la aceasta dimensiune raman in memorie pana la
+    # criptare (Werkzeug le scrie implicit pe disc peste 500KB, apoi le reciteste)
+    UPLOAD_SPOOL_MAX_SIZE = 4 * 1024 * 1024
+    # Numar de thread-uri pentru criptarea in paralel a fisierelor uploadate
+    FILE_ENCRYPTION_WORKERS = min(4, os.cpu_count() or 1)
+    
+    # Redis pentru cache-ul raspunsurilor interogate des (optional; fara el, cache in proces)
+    REDIS_URL = os.environ.get('REDIS_URL')
+    
+    # Dimensiunea maxima a unui mesaj text criptat pe server (fisierele merg prin /api/files)
+    MAX_MESSAGE_BYTES = 64 * 1024
+    # Limita corpului cererii JSON pentru mesaje text (loc pentru escape-uri \uXXXX)
+    MAX_MESSAGE_REQUEST_BYTES = 8 * MAX_MESSAGE_BYTES
+    # Lungimea maxima a continutului pre-criptat de client: base64 al unui mesaj
+    # de MAX_MESSAGE_BYTES plus un bloc de padding/tag
+    MAX_ENCRYPTED_MESSAGE_CHARS = 4 * ((MAX_MESSAGE_BYTES + 16 + 2) // 3)
+    
+    # Limitare rata pentru polling (Flask-Limiter, daca este instalat)
+    # Contoarele stau in Redis daca este configurat, altfel in memoria procesului
+    RATELIMIT_STORAGE_URI = REDIS_URL or 'memory://'
+    RATELIMIT_SWALLOW_ERRORS = True  # Redis indisponibil: cererea trece nelimitata
+    RATELIMIT_HEADERS_ENABLED = True
+    POLL_RATE_LIMIT = '60/minute'
+    MESSAGES_RATE_LIMIT = '10/second'
+    
+    # Comprimare raspunsuri API (Flask-Compress, daca este instalat)
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_MIMETYPES = ['application/json']
+    COMPRESS_MIN_SIZE = 1024
+    COMPRESS_BR_LEVEL = 4
+    COMPRESS_LEVEL = 6
+    
+    # Cache browser pentru fisierele cu hash din build/static (1 an)
+    STATIC_CACHE_MAX_AGE = 365 * 24 * 3600
     
     # Extensii permise pentru upload
     ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx', 'xls', 'xlsx', 'ppt', 'pptx', 'zip', 'rar', 'log', 'csv', 'json', 'xml'}
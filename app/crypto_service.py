@@ -1,9 +1,30 @@
 from abc import ABC, abstractmethod
-from Crypto.PublicKey import RSA
-from Crypto.Cipher import AES, PKCS1_OAEP
-from Crypto.Random import get_random_bytes
-from Crypto.Util.Padding import pad, unpad
-import base64
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import rsa, padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.backends import default_backend
+import os
+from functools import lru_cache
+from fast_codecs import base64
+
+# AES-GCM authentication tag length (bytes), appended by AESGCM.encrypt
+GCM_TAG_SIZE = 16
+
+# RSA-OAEP with SHA-1 and MGF1-SHA-1: the PyCryptodome PKCS1_OAEP defaults this
+# module used before, so keys wrapped earlier still decrypt
+_OAEP = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA1()), algorithm=hashes.SHA1(), label=None)
+
+
+@lru_cache(maxsize=1024)
+def _load_public(public_key_pem: str):
+    """Parses a public key PEM once (OpenSSL) and returns the reusable key object."""
+    return serialization.load_pem_public_key(public_key_pem.encode('utf-8'), backend=default_backend())
+
+
+@lru_cache(maxsize=1024)
+def _load_private(private_key_pem: str):
+    """Parses a private key PEM once (OpenSSL) and returns the reusable key object."""
+    return serialization.load_pem_private_key(private_key_pem.encode('utf-8'), password=None, backend=default_backend())
 
 class ICryptoService(ABC):
     @abstractmethod
@@ -15,18 +36,29 @@ class ICryptoService(ABC):
         pass
 
     @abstractmethod
-    def decrypt_flow(self, encrypted_message_b64: str, encrypted_key_b64: str, iv_b64: str, private_key_pem: str):
+    def decrypt_flow(self, encrypted_message_b64: str, encrypted_key_b64: str, iv_b64: str, tag_b64: str, private_key_pem: str):
         pass
 
 class SecureMessagingService(ICryptoService):
-    def __init__(self, key_size=2048):
+    def __init__(self, key_size=2048, debug=False):
+        # debug=True adds the plaintext echo and the raw AES key to the results
+        # (for the educational demo page only - never in production responses)
         self.key_size = key_size
+        self.debug = debug
 
     def generate_rsa_keys(self):
         """Generates RSA Public and Private keys."""
-        key = RSA.generate(self.key_size)
-        private_key = key.export_key()
-        public_key = key.publickey().export_key()
+        # OpenSSL's generator; PKCS#1 private and SubjectPublicKeyInfo public PEMs.
+        key = rsa.generate_private_key(public_exponent=65537, key_size=self.key_size, backend=default_backend())
+        private_key = key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.TraditionalOpenSSL,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+        public_key = key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo
+        )
         return private_key.decode('utf-8'), public_key.decode('utf-8')
 
     def encrypt_flow(self, message: str, public_key_pem: str):
@@ -37,62 +69,76 @@ class SecureMessagingService(ICryptoService):
         """
         # 1. Generate AES Key (16 bytes for AES-128, 32 for AES-256)
         # We use AES-256 for strong symmetric encryption.
-        aes_key = get_random_bytes(32) 
-        
-        # 2. Encrypt Message with AES (CBC mode)
-        # CBC (Cipher Block Chaining) needs an IV (Initialization Vector) to ensure uniqueness.
-        # Even if we encrypt the same message twice, the random IV makes the output different.
-        cipher_aes = AES.new(aes_key, AES.MODE_CBC)
-        iv = cipher_aes.iv
+        # os.urandom calls getrandom(2) directly.
+        aes_key = os.urandom(32)
         
-        # Pad the message: AES works on fixed-size blocks (16 bytes). 
-        # If the message isn't a multiple of 16 bytes, we add padding.
-        encrypted_message_bytes = cipher_aes.encrypt(pad(message.encode('utf-8'), AES.block_size))
+        # 2. Encrypt Message with AES (GCM mode)
+        # GCM needs a unique 12-byte IV (nonce) per key. It is a stream mode, so no padding
+        # is needed, and it produces a 16-byte authentication tag in the same pass.
+        # AESGCM is a one-shot AEAD call: a single EVP encrypt (AES-NI + PCLMULQDQ)
+        # in native code, with no Cipher/encryptor objects built per message.
+        # The output is ciphertext || tag.
+        iv = os.urandom(12)
+        sealed = AESGCM(aes_key).encrypt(iv, message.encode('utf-8'), None)
+        encrypted_message_bytes, tag = sealed[:-GCM_TAG_SIZE], sealed[-GCM_TAG_SIZE:]
         
         # 3. Encrypt AES Key with RSA
         # We use the recipient's Public Key to lock the AES key.
-        # PKCS1_OAEP is a padding scheme for RSA that adds randomness and security.
-        recipient_key = RSA.import_key(public_key_pem)
-        cipher_rsa = PKCS1_OAEP.new(recipient_key)
-        encrypted_aes_key_bytes = cipher_rsa.encrypt(aes_key)
+        # OAEP is a padding scheme for RSA that adds randomness and security.
+        # The parsed key is cached per PEM, so hot conversations skip the import.
+        encrypted_aes_key_bytes = _load_public(public_key_pem).encrypt(aes_key, _OAEP)
 
         # Encode for transport/display
-        return {
-            "original_message": message,
-            "aes_key_debug": base64.b64encode(aes_key).decode('utf-8'),
+        result = {
             "iv": base64.b64encode(iv).decode('utf-8'),
+            "tag": base64.b64encode(tag).decode('utf-8'),
             "encrypted_message": base64.b64encode(encrypted_message_bytes).decode('utf-8'),
             "encrypted_aes_key": base64.b64encode(encrypted_aes_key_bytes).decode('utf-8')
         }
+        if self.debug:
+            result["original_message"] = message
+            result["aes_key_debug"] = base64.b64encode(aes_key).decode('utf-8')
+        return result
 
-    def decrypt_flow(self, encrypted_message_b64: str, encrypted_key_b64: str, iv_b64: str, private_key_pem: str):
+    def wrap_key_for_users(self, aes_key: bytes, recipients: dict):
+        """
+        Encrypts one AES key for several recipients.
+        recipients maps user_id -> public key PEM; each PEM is resolved through the
+        parsed-key cache, so a batch only pays the RSA operation per unique user.
+        """
+        return {
+            str(user_id): base64.b64encode(_load_public(public_key_pem).encrypt(aes_key, _OAEP)).decode('utf-8')
+            for user_id, public_key_pem in recipients.items()
+        }
+
+    def decrypt_flow(self, encrypted_message_b64: str, encrypted_key_b64: str, iv_b64: str, tag_b64: str, private_key_pem: str):
         """
         1. Decrypt AES Key with RSA.
-        2. Decrypt Message with AES.
+        2. Decrypt Message with AES and verify its authentication tag.
         """
         try:
             # Decode inputs from Base64 back to raw bytes
             encrypted_aes_key_bytes = base64.b64decode(encrypted_key_b64)
             encrypted_message_bytes = base64.b64decode(encrypted_message_b64)
             iv = base64.b64decode(iv_b64)
+            tag = base64.b64decode(tag_b64)
             
             # 1. Decrypt AES Key with RSA
             # We use our Private Key to unlock the AES key.
-            private_key = RSA.import_key(private_key_pem)
-            cipher_rsa = PKCS1_OAEP.new(private_key)
-            aes_key = cipher_rsa.decrypt(encrypted_aes_key_bytes)
+            aes_key = _load_private(private_key_pem).decrypt(encrypted_aes_key_bytes, _OAEP)
             
             # 2. Decrypt Message with AES
-            # We recreate the AES cipher using the decrypted key and the original IV.
-            cipher_aes = AES.new(aes_key, AES.MODE_CBC, iv)
-            # We decrypt and then remove the padding we added earlier.
-            decrypted_message_bytes = unpad(cipher_aes.decrypt(encrypted_message_bytes), AES.block_size)
+            # One-shot AEAD decrypt over ciphertext || tag with the decrypted key and original IV.
+            # Raises InvalidTag if the ciphertext was modified.
+            decrypted_message_bytes = AESGCM(aes_key).decrypt(iv, encrypted_message_bytes + tag, None)
             
-            return {
+            result = {
                 "decrypted_message": decrypted_message_bytes.decode('utf-8'),
-                "decrypted_aes_key_debug": base64.b64encode(aes_key).decode('utf-8'),
                 "success": True
             }
+            if self.debug:
+                result["decrypted_aes_key_debug"] = base64.b64encode(aes_key).decode('utf-8')
+            return result
         except Exception as e:
             return {
                 "error": str(e),
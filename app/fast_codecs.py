@@ -0,0 +1,50 @@
+# fast_codecs.py
+# Implementarile rapide (optionale) pentru base64 si JSON, comune modelelor si serviciilor
+#
+# pybase64 (SIMD) si orjson (Rust) au acelasi API ca modulele din biblioteca
+# standard; fara ele instalate se folosesc base64 si json.
+
+import json
+from functools import cached_property
+try:
+    # pybase64: implementare SIMD (SSE/AVX2), API compatibil cu modulul base64
+    import pybase64 as base64
+except ImportError:  # pragma: no cover - fallback pe biblioteca standard
+    import base64
+try:
+    # orjson: parsare JSON in Rust pentru hartile de chei AES (citite la fiecare pagina)
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover - fallback pe biblioteca standard
+    from json import loads as json_loads
+
+__all__ = ['base64', 'json_loads', 'parse_key_map', 'EncryptedKeysMixin']
+
+
+def parse_key_map(encrypted_aes_keys):
+    """
+    Parseaza harta JSON a cheilor AES criptate per utilizator.
+    
+    Args:
+        encrypted_aes_keys: JSON {user_id: cheie_criptata_base64} sau None
+    
+    Returns:
+        dict: {str(user_id): cheie_criptata_base64}, gol daca valoarea lipseste sau e invalida
+    """
+    try:
+        return json_loads(encrypted_aes_keys or '{}')
+    except (json.JSONDecodeError, TypeError):
+        return {}
+
+
+class EncryptedKeysMixin:
+    """Pentru modelele cu coloana encrypted_aes_keys (Message, MessageAttachment)."""
+    
+    @cached_property
+    def encrypted_keys(self):
+        """
+        Cheile AES criptate per utilizator, parsate o singura data per instanta.
+        
+        Returns:
+            dict: {str(user_id): cheie_criptata_base64}
+        """
+        return parse_key_map(self.encrypted_aes_keys)
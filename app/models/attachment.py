@@ -2,11 +2,14 @@
 # Model pentru atasamente la mesaje (fisiere multiple)
 # Permite atasarea mai multor fisiere la un singur mesaj
 
-from datetime import datetime
+import json
+from functools import lru_cache
+from types import MappingProxyType
+from fast_codecs import EncryptedKeysMixin
 from . import db
 
 
-class MessageAttachment(db.Model):
+class MessageAttachment(EncryptedKeysMixin, db.Model):
     """
     Model pentru atasamente la mesaje.
     
@@ -47,13 +50,13 @@ class MessageAttachment(db.Model):
     # Optional: thumbnail pentru imagini
     thumbnail_path = db.Column(db.String(500), nullable=True)
     
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    created_at = db.Column(db.DateTime, default=db.func.now(), server_default=db.func.now())
     
     # Relatia cu mesajul
-    message = db.relationship('Message', backref=db.backref('attachments', lazy='select'))
+    message = db.relationship('Message', back_populates='attachments')
     
     # Mapare extensii -> tip fisier (SINGLE SOURCE OF TRUTH)
-    EXTENSION_TO_TYPE = {
+    EXTENSION_TO_TYPE = MappingProxyType({
         # Imagini
         'jpg': 'image', 'jpeg': 'image', 'png': 'image', 'gif': 'image',
         'webp': 'image', 'svg': 'image', 'bmp': 'image', 'ico': 'image',
@@ -67,16 +70,54 @@ class MessageAttachment(db.Model):
         'pdf': 'document', 'doc': 'document', 'docx': 'document',
         'xls': 'document', 'xlsx': 'document', 'ppt': 'document', 'pptx': 'document',
         'txt': 'document', 'rtf': 'document', 'csv': 'document',
-    }
+    })
     
     # Mapare extensii -> iconita specifica
-    EXTENSION_TO_ICON = {
+    EXTENSION_TO_ICON = MappingProxyType({
         'pdf': 'pdf',
         'doc': 'word', 'docx': 'word', 'odt': 'word', 'rtf': 'word',
         'xls': 'excel', 'xlsx': 'excel', 'ods': 'excel', 'csv': 'excel',
         'ppt': 'powerpoint', 'pptx': 'powerpoint', 'odp': 'powerpoint',
         'txt': 'text',
-    }
+    })
+    
+    # Mapare MIME exacta -> iconita pentru documente (fallback cand nu avem extensie)
+    MIME_TO_DOCUMENT_ICON = MappingProxyType({
+        'application/pdf': 'pdf',
+        'application/msword': 'word',
+        'application/vnd.openxmlformats-officedocument.wordprocessingml.document': 'word',
+        'application/vnd.oasis.opendocument.text': 'word',
+        'application/rtf': 'word',
+        'application/vnd.ms-excel': 'excel',
+        'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet': 'excel',
+        'application/vnd.oasis.opendocument.spreadsheet': 'excel',
+        'text/csv': 'excel',
+        'application/vnd.ms-powerpoint': 'powerpoint',
+        'application/vnd.openxmlformats-officedocument.presentationml.presentation': 'powerpoint',
+        'application/vnd.oasis.opendocument.presentation': 'powerpoint',
+        'text/plain': 'text',
+    })
+    
+    # Categorii deduse direct din prima parte a MIME type (image/png -> image)
+    MIME_PREFIX_TO_TYPE = MappingProxyType({'image': 'image', 'video': 'video', 'audio': 'audio'})
+    
+    @classmethod
+    def build_encrypted_keys(cls, encrypted_keys):
+        """
+        Serializeaza cheile AES criptate per utilizator pentru coloana encrypted_aes_keys.
+        
+        Args:
+            encrypted_keys: Dict {user_id: cheie_criptata_base64} sau JSON deja serializat
+            
+        Returns:
+            str: JSON compact (fara spatii) - mai mic in baza de date
+        """
+        if isinstance(encrypted_keys, str):
+            return encrypted_keys
+        return json.dumps(
+            {str(user_id): key for user_id, key in (encrypted_keys or {}).items()},
+            separators=(',', ':')
+        )
     
     @staticmethod
     def get_extension(filename):
@@ -86,57 +127,32 @@ class MessageAttachment(db.Model):
         return filename.rsplit('.', 1)[-1].lower()
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def get_file_type_from_name(filename):
         """Determina tipul fisierului bazat pe extensie."""
-        ext = MessageAttachment.get_extension(filename)
-        return MessageAttachment.EXTENSION_TO_TYPE.get(ext, 'other')
+        return _EXTENSION_INFO.get(MessageAttachment.get_extension(filename), _UNKNOWN_EXTENSION)[0]
     
     @staticmethod
     def get_file_type(mime_type):
         """Fallback: determina categoria bazat pe MIME type."""
         if not mime_type:
             return 'other'
-        if mime_type.startswith('image/'):
-            return 'image'
-        elif mime_type.startswith('video/'):
-            return 'video'
-        elif mime_type.startswith('audio/'):
-            return 'audio'
-        elif 'pdf' in mime_type or 'word' in mime_type or 'document' in mime_type:
-            return 'document'
-        elif 'excel' in mime_type or 'spreadsheet' in mime_type:
+        if mime_type in MessageAttachment.MIME_TO_DOCUMENT_ICON:
             return 'document'
-        elif 'powerpoint' in mime_type or 'presentation' in mime_type:
-            return 'document'
-        elif mime_type == 'text/plain':
-            return 'document'
-        return 'other'
+        return MessageAttachment.MIME_PREFIX_TO_TYPE.get(mime_type.partition('/')[0], 'other')
     
     @staticmethod
+    @lru_cache(maxsize=4096)
     def get_file_icon_from_name(filename):
         """Determina iconita bazat pe extensia fisierului."""
-        ext = MessageAttachment.get_extension(filename)
-        # Iconita specifica (pdf, word, etc)
-        if ext in MessageAttachment.EXTENSION_TO_ICON:
-            return MessageAttachment.EXTENSION_TO_ICON[ext]
-        # Iconita generica bazata pe tip
-        file_type = MessageAttachment.EXTENSION_TO_TYPE.get(ext, 'other')
-        return file_type if file_type != 'other' else 'file'
+        return _EXTENSION_INFO.get(MessageAttachment.get_extension(filename), _UNKNOWN_EXTENSION)[1]
     
     @staticmethod
     def get_file_icon(file_type, mime_type):
         """Fallback: returneaza iconita bazat pe tip si MIME."""
-        if mime_type:
-            if 'pdf' in mime_type:
-                return 'pdf'
-            elif 'word' in mime_type or mime_type == 'application/msword':
-                return 'word'
-            elif 'powerpoint' in mime_type or 'presentation' in mime_type:
-                return 'powerpoint'
-            elif 'excel' in mime_type or 'spreadsheet' in mime_type:
-                return 'excel'
-            elif mime_type == 'text/plain':
-                return 'text'
+        icon = MessageAttachment.MIME_TO_DOCUMENT_ICON.get(mime_type) if mime_type else None
+        if icon:
+            return icon
         icons = {'image': 'image', 'video': 'video', 'audio': 'audio', 'document': 'file'}
         return icons.get(file_type, 'file')
     
@@ -159,7 +175,7 @@ class MessageAttachment(db.Model):
             'file_icon': file_icon,
             'iv': self.iv,
             'created_at': self.created_at.isoformat() if self.created_at else None,
-            'has_key': user_id is not None and str(user_id) in (self.encrypted_aes_keys or ''),
+            'has_key': user_id is not None and str(user_id) in self.encrypted_keys,
             'can_download': True
         }
     
@@ -173,3 +189,16 @@ class MessageAttachment(db.Model):
                 return f"{size:.1f} {unit}"
             size /= 1024
         return f"{size:.1f} TB"
+
+
+# Extensie -> (tip, iconita), precalculat o singura data din cele doua mapari.
+# Iconita specifica (pdf, word, etc) are prioritate fata de cea generica bazata pe tip
+_UNKNOWN_EXTENSION = ('other', 'file')
+_EXTENSION_INFO = MappingProxyType({
+    ext: (
+        MessageAttachment.EXTENSION_TO_TYPE.get(ext, 'other'),
+        MessageAttachment.EXTENSION_TO_ICON.get(ext)
+        or MessageAttachment.EXTENSION_TO_TYPE.get(ext, _UNKNOWN_EXTENSION[1])
+    )
+    for ext in {**MessageAttachment.EXTENSION_TO_TYPE, **MessageAttachment.EXTENSION_TO_ICON}
+})
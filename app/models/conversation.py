@@ -2,7 +2,8 @@
 # Model pentru conversatii si participanti
 # Suporta conversatii intre doi sau mai multi utilizatori
 
-from datetime import datetime
+from sqlalchemy import func, update
+from sqlalchemy.orm import load_only
 from . import db
 
 
@@ -26,13 +27,20 @@ class Conversation(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=True)  # Nume pentru grupuri
     is_group = db.Column(db.Boolean, default=False)
-    created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Timestamp-urile sunt calculate de baza de date (CURRENT_TIMESTAMP, UTC).
+    # server_default intra in schema tabelelor noi; create_all nu modifica
+    # tabelele existente, deci default=func.now() (tot CURRENT_TIMESTAMP, in
+    # INSERT-ul generat) ramane pentru bazele de date create inainte.
+    # Rezolutia este de o secunda: ordonarea dupa updated_at are id ca departajare
+    created_at = db.Column(db.DateTime, default=func.now(), server_default=func.now())
+    updated_at = db.Column(db.DateTime, default=func.now(), server_default=func.now(),
+                           onupdate=func.now())
     
     # Relatii
+    # selectin: participantii tuturor conversatiilor incarcate vin intr-un singur query
     participants = db.relationship('ConversationParticipant', backref='conversation', 
-                                   lazy='dynamic', cascade='all, delete-orphan')
-    messages = db.relationship('Message', backref='conversation', lazy='dynamic',
+                                   lazy='selectin', cascade='all, delete-orphan')
+    messages = db.relationship('Message', back_populates='conversation', lazy='dynamic',
                                cascade='all, delete-orphan', order_by='Message.created_at')
     
     def get_other_participant(self, user_id):
@@ -54,17 +62,66 @@ class Conversation(db.Model):
         """
         Obtine ultimul mesaj din conversatie.
         
+        Foloseste indexul compus (conversation_id, created_at) din Message.
+        order_by(None) elimina ordonarea implicita a relatiei, altfel
+        ORDER BY created_at DESC ar fi adaugat dupa created_at ASC.
+        
         Returns:
             Message: Ultimul mesaj sau None
         """
-        return self.messages.order_by(db.desc('created_at')).first()
+        # Preincarcat de preload_last_messages (lista de conversatii)
+        if '_last_message' in self.__dict__:
+            return self.__dict__['_last_message']
+        return self.messages.order_by(None).order_by(db.desc('created_at')).limit(1).first()
+    
+    @classmethod
+    def preload_last_messages(cls, conversations):
+        """
+        Incarca ultimul mesaj pentru mai multe conversatii intr-un singur query.
+        
+        Foloseste ROW_NUMBER() partitionat pe conversatie in loc de
+        cate un query get_last_message per conversatie (N+1). Se incarca
+        doar coloanele folosite de to_dict, fara continutul criptat si cheile.
+        
+        Args:
+            conversations: Lista de conversatii
+            
+        Returns:
+            list: Aceeasi lista, cu ultimul mesaj atasat fiecarei conversatii
+        """
+        from .message import Message
+        
+        if not conversations:
+            return conversations
+        
+        ranked = db.session.query(
+            Message.id.label('id'),
+            func.row_number().over(
+                partition_by=Message.conversation_id,
+                order_by=(Message.created_at.desc(), Message.id.desc())
+            ).label('rn')
+        ).filter(
+            Message.conversation_id.in_([c.id for c in conversations])
+        ).subquery()
+        
+        last_messages = Message.query.join(ranked, Message.id == ranked.c.id).filter(
+            ranked.c.rn == 1
+        ).options(
+            load_only(Message.id, Message.conversation_id, Message.sender_id, Message.created_at)
+        ).all()
+        by_conversation = {m.conversation_id: m for m in last_messages}
+        
+        for conversation in conversations:
+            conversation.__dict__['_last_message'] = by_conversation.get(conversation.id)
+        return conversations
     
     def update_timestamp(self):
         """
         Actualizeaza timestamp-ul conversatiei.
-        Apelat la fiecare mesaj nou.
+        Apelat la fiecare mesaj nou. Valoarea este calculata de baza
+        de date la flush (UPDATE ... SET updated_at=CURRENT_TIMESTAMP).
         """
-        self.updated_at = datetime.utcnow()
+        self.updated_at = func.now()
     
     def to_dict(self, current_user_id=None):
         """
@@ -88,9 +145,10 @@ class Conversation(db.Model):
         # Obtinem numarul de mesaje necitite pentru utilizatorul curent
         unread_count = 0
         if current_user_id:
-            participant = self.participants.filter_by(user_id=current_user_id).first()
-            if participant:
-                unread_count = participant.unread_count
+            for participant in self.participants:
+                if participant.user_id == current_user_id:
+                    unread_count = participant.unread_count
+                    break
         
         last_message = self.get_last_message()
         
@@ -102,7 +160,7 @@ class Conversation(db.Model):
             'other_user': other_user.to_dict() if other_user else None,
             'last_message': {
                 'preview': '...',  # Nu afisam continutul criptat
-                'created_at': last_message.created_at.isoformat() if last_message else None,
+                'created_at': last_message.created_at_iso,
                 'sender_id': last_message.sender_id if last_message else None
             } if last_message else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
@@ -135,13 +193,20 @@ class ConversationParticipant(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    joined_at = db.Column(db.DateTime, default=datetime.utcnow)
+    joined_at = db.Column(db.DateTime, default=func.now(), server_default=func.now())
     unread_count = db.Column(db.Integer, default=0)
     last_read_at = db.Column(db.DateTime, nullable=True)
     
     # Index compus pentru cautari rapide
     __table_args__ = (
         db.UniqueConstraint('conversation_id', 'user_id', name='unique_participant'),
+        # Conversatiile unui utilizator (JOIN dupa user_id): constrangerea unica
+        # incepe cu conversation_id si nu poate fi folosita pentru acest filtru
+        db.Index('ix_cp_user_conv', 'user_id', 'conversation_id'),
+        # Index partial: doar participarile cu mesaje necitite (badge-ul de necitite)
+        db.Index('ix_cp_unread', 'user_id',
+                 sqlite_where=db.text('unread_count > 0'),
+                 postgresql_where=db.text('unread_count > 0')),
     )
     
     def mark_as_read(self):
@@ -149,7 +214,7 @@ class ConversationParticipant(db.Model):
         Marcheaza toate mesajele ca citite pentru acest participant.
         """
         self.unread_count = 0
-        self.last_read_at = datetime.utcnow()
+        self.last_read_at = func.now()
     
     def increment_unread(self):
         """
@@ -158,5 +223,25 @@ class ConversationParticipant(db.Model):
         """
         self.unread_count += 1
     
+    @classmethod
+    def bulk_increment_unread(cls, conversation_id, exclude_user_id):
+        """
+        Incrementeaza contorul de necitite pentru toti participantii unei
+        conversatii, cu exceptia expeditorului, printr-un singur UPDATE.
+        
+        Evita incarcarea fiecarui participant si cate un UPDATE per obiect
+        (conteaza in grupuri mari).
+        
+        Args:
+            conversation_id: ID conversatie
+            exclude_user_id: ID utilizator exclus (expeditorul)
+        """
+        db.session.execute(
+            update(cls)
+            .where(cls.conversation_id == conversation_id, cls.user_id != exclude_user_id)
+            .values(unread_count=cls.unread_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+    
     def __repr__(self):
         return f'<ConversationParticipant user={self.user_id} conv={self.conversation_id}>'
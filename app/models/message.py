@@ -2,11 +2,102 @@
 # Model pentru mesaje criptate
 # Stocheaza mesajele criptate cu AES si cheia AES criptata cu RSA
 
+import time
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from fast_codecs import EncryptedKeysMixin
 from . import db
 
 
-class Message(db.Model):
+# Tipuri de mesaje care au un fisier atasat direct (mesaje vechi)
+FILE_MESSAGE_TYPES = frozenset({'image', 'file'})
+
+# Suite de criptare, deduse din lungimea IV-ului (fara coloana separata):
+# nonce de 12 bytes pentru GCM (mesaje noi), IV de 16 bytes pentru CBC
+CIPHER_SUITE_CBC = 'AES-256-CBC'
+CIPHER_SUITE_GCM = 'AES-256-GCM'
+_GCM_NONCE_B64_LENGTH = 16  # base64(12 bytes)
+
+# Informatii educationale despre criptare - identice pentru toate mesajele
+# aceleiasi suite. Dict-uri simple (nu MappingProxyType) pentru ca serializatorul
+# JSON le accepta direct; nu trebuie modificate de apelanti.
+CRYPTO_INFO = {
+    'encryption_algorithm': CIPHER_SUITE_CBC,
+    'key_exchange': 'RSA-2048',
+    'iv_size_bytes': 16,
+    'aes_key_size_bits': 256,
+    'description_ro': (
+        'Mesajul este criptat cu AES-256 in mod CBC. '
+        'Cheia AES este generata aleator pentru fiecare mesaj si '
+        'este criptata cu cheia publica RSA a fiecarui destinatar. '
+        'Doar destinatarii pot decripta cheia AES cu cheile lor private.'
+    )
+}
+
+CRYPTO_INFO_GCM = {
+    'encryption_algorithm': CIPHER_SUITE_GCM,
+    'key_exchange': 'RSA-2048',
+    'iv_size_bytes': 12,
+    'aes_key_size_bits': 256,
+    'description_ro': (
+        'Mesajul este criptat cu AES-256 in mod GCM, care verifica si '
+        'integritatea continutului. '
+        'Cheia AES este generata aleator pentru fiecare mesaj si '
+        'este criptata cu cheia publica RSA a fiecarui destinatar. '
+        'Doar destinatarii pot decripta cheia AES cu cheile lor private.'
+    )
+}
+
+class _SenderInfoCache:
+    """
+    Cache per proces (LRU cu TTL) pentru datele de afisare ale expeditorilor:
+    {user_id: (username, avatar_color)}.
+    
+    Username-ul nu se schimba; avatar_color este invalidat prin
+    Message.forget_sender doar in procesul care a modificat profilul -
+    in ceilalti workeri intrarea expira dupa ttl secunde.
+    """
+    
+    def __init__(self, maxsize=4096, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get_many(self, user_ids):
+        """Returneaza {user_id: info} pentru intrarile prezente si neexpirate."""
+        now = time.monotonic()
+        found = {}
+        with self._lock:
+            for user_id in user_ids:
+                entry = self._entries.get(user_id)
+                if entry is None:
+                    continue
+                info, expires = entry
+                if expires < now:
+                    del self._entries[user_id]
+                    continue
+                self._entries.move_to_end(user_id)
+                found[user_id] = info
+        return found
+    
+    def put(self, user_id, info):
+        with self._lock:
+            self._entries[user_id] = (info, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+    
+    def forget(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+
+_sender_info = _SenderInfoCache()
+
+
+class Message(EncryptedKeysMixin, db.Model):
     """
     Model pentru mesaje criptate.
     
@@ -21,9 +112,9 @@ class Message(db.Model):
         id: Identificator unic al mesajului
         conversation_id: Referinta la conversatie
         sender_id: ID-ul expeditorului
-        encrypted_content: Continutul criptat cu AES-256-CBC (base64)
+        encrypted_content: Continutul criptat cu AES-256-GCM sau AES-256-CBC (base64)
         encrypted_aes_key: Cheia AES criptata cu RSA pentru fiecare destinatar (JSON)
-        iv: Vector de initializare pentru AES-CBC (base64)
+        iv: Nonce AES-GCM sau vector de initializare AES-CBC (base64)
         message_type: Tipul mesajului (text/image/file)
         file_name: Numele original al fisierului (pentru atasamente)
         file_path: Calea pe server a fisierului criptat
@@ -34,12 +125,18 @@ class Message(db.Model):
     
     __tablename__ = 'messages'
     
+    # Index compus pentru ultimul mesaj dintr-o conversatie
+    # (ORDER BY created_at DESC LIMIT 1 devine un index seek)
+    __table_args__ = (
+        db.Index('ix_msg_conv_created', 'conversation_id', 'created_at'),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
     conversation_id = db.Column(db.Integer, db.ForeignKey('conversations.id'), nullable=False, index=True)
     sender_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
     
     # Date criptate - schema hibrida AES+RSA
-    # Continutul mesajului criptat cu AES-256 in mod CBC
+    # Continutul mesajului criptat cu AES-256 in mod GCM (mesajele vechi: CBC)
     encrypted_content = db.Column(db.Text, nullable=False)
     
     # Cheia AES criptata cu RSA pentru fiecare participant
@@ -47,7 +144,8 @@ class Message(db.Model):
     # Fiecare utilizator poate decripta cheia AES cu propria cheie privata RSA
     encrypted_aes_keys = db.Column(db.Text, nullable=False)
     
-    # Vectorul de initializare pentru AES-CBC (16 bytes, base64 encoded)
+    # Vectorul de initializare: nonce de 12 bytes pentru AES-GCM sau
+    # IV de 16 bytes pentru AES-CBC (base64 encoded); lungimea indica suita
     # IV trebuie sa fie unic pentru fiecare mesaj dar nu trebuie sa fie secret
     iv = db.Column(db.String(32), nullable=False)
     
@@ -63,6 +161,33 @@ class Message(db.Model):
     # Timestamp trimitere
     created_at = db.Column(db.DateTime, default=datetime.utcnow, index=True)
     
+    # Relatiile folosite de statement-urile construite la nivel de modul in
+    # servicii si rute (ex: _MESSAGES_PAGE, _MESSAGE_WITH_CONTEXT) sunt declarate
+    # aici, nu ca backref din User / MessageAttachment / Conversation: un backref
+    # exista abia dupa configurarea mapper-elor, deci nu si la importul modulelor
+    sender = db.relationship('User', back_populates='sent_messages', foreign_keys=[sender_id])
+    attachments = db.relationship('MessageAttachment', back_populates='message', lazy='select')
+    conversation = db.relationship('Conversation', back_populates='messages')
+    
+    @property
+    def cipher_suite(self):
+        """Suita de criptare a continutului, dedusa din lungimea IV-ului."""
+        if self.iv and len(self.iv) == _GCM_NONCE_B64_LENGTH:
+            return CIPHER_SUITE_GCM
+        return CIPHER_SUITE_CBC
+    
+    @property
+    def created_at_iso(self):
+        """
+        Data trimiterii in format ISO 8601, calculata o singura data per instanta.
+        
+        Nu se memoreaza None: inainte de flush created_at nu are inca valoare.
+        """
+        iso = self.__dict__.get('_created_at_iso')
+        if iso is None and self.created_at is not None:
+            iso = self.__dict__['_created_at_iso'] = self.created_at.isoformat()
+        return iso
+    
     def get_encrypted_key_for_user(self, user_id):
         """
         Obtine cheia AES criptata pentru un utilizator specific.
@@ -73,12 +198,51 @@ class Message(db.Model):
         Returns:
             str: Cheia AES criptata (base64) sau None
         """
-        import json
-        try:
-            keys = json.loads(self.encrypted_aes_keys)
-            return keys.get(str(user_id))
-        except (json.JSONDecodeError, TypeError):
-            return None
+        return self.encrypted_keys.get(str(user_id))
+    
+    @classmethod
+    def preload_senders(cls, messages):
+        """
+        Ataseaza datele de afisare ale expeditorilor unei liste de mesaje.
+        
+        Expeditorii sunt luati din cache-ul per proces (LRU cu TTL); doar cei lipsa sunt
+        cititi din users, intr-un singur query IN pe coloanele necesare.
+        
+        Args:
+            messages: Lista de mesaje
+            
+        Returns:
+            list: Aceeasi lista, cu datele expeditorului atasate fiecarui mesaj
+        """
+        from .user import User
+        
+        sender_ids = {m.sender_id for m in messages}
+        senders = _sender_info.get_many(sender_ids)
+        missing = sender_ids - senders.keys()
+        if missing:
+            rows = db.session.query(User.id, User.username, User.avatar_color).filter(
+                User.id.in_(missing)
+            ).all()
+            for user_id, username, avatar_color in rows:
+                senders[user_id] = (username, avatar_color)
+                _sender_info.put(user_id, senders[user_id])
+        
+        for message in messages:
+            message.__dict__['_sender_info'] = senders.get(message.sender_id)
+        return messages
+    
+    @staticmethod
+    def forget_sender(user_id):
+        """Scoate din cache datele de afisare ale unui utilizator (profil modificat)."""
+        _sender_info.forget(user_id)
+    
+    def _get_sender_info(self):
+        """Returneaza (username, avatar_color) al expeditorului sau None."""
+        # Preincarcat de preload_senders (pagina de mesaje)
+        if '_sender_info' in self.__dict__:
+            return self.__dict__['_sender_info']
+        sender = self.sender
+        return (sender.username, sender.avatar_color) if sender else None
     
     def to_dict(self, current_user_id=None):
         """
@@ -93,24 +257,44 @@ class Message(db.Model):
         Returns:
             dict: Reprezentarea JSON a mesajului
         """
+        return self.to_dict_for_user(str(current_user_id) if current_user_id else None)
+    
+    def to_dict_for_user(self, str_uid):
+        """
+        Varianta to_dict pentru serializarea unei pagini intregi de mesaje.
+        
+        ID-ul utilizatorului este convertit la str o singura data de apelant
+        (cheile din encrypted_keys sunt string-uri), nu la fiecare mesaj.
+        
+        Args:
+            str_uid: str(ID-ul utilizatorului curent) sau None
+            
+        Returns:
+            dict: Reprezentarea JSON a mesajului
+        """
+        # Atributele ORM sunt citite o singura data (fiecare acces trece prin descriptor)
+        sender_info = self._get_sender_info()
+        message_type = self.message_type
+        
         result = {
             'id': self.id,
             'conversation_id': self.conversation_id,
             'sender_id': self.sender_id,
-            'sender_username': self.sender.username if self.sender else None,
-            'sender_avatar_color': self.sender.avatar_color if self.sender else None,
+            'sender_username': sender_info[0] if sender_info else None,
+            'sender_avatar_color': sender_info[1] if sender_info else None,
             'encrypted_content': self.encrypted_content,
             'iv': self.iv,
-            'message_type': self.message_type,
-            'created_at': self.created_at.isoformat() if self.created_at else None
+            'cipher_suite': self.cipher_suite,
+            'message_type': message_type,
+            'created_at': self.created_at_iso
         }
         
         # Adaugam cheia AES criptata doar pentru utilizatorul curent
-        if current_user_id:
-            result['encrypted_aes_key'] = self.get_encrypted_key_for_user(current_user_id)
+        if str_uid:
+            result['encrypted_aes_key'] = self.encrypted_keys.get(str_uid)
         
         # Informatii fisier daca exista (pentru compatibilitate cu mesaje vechi)
-        if self.message_type in ['image', 'file']:
+        if message_type in FILE_MESSAGE_TYPES:
             result['file_info'] = {
                 'name': self.file_name,
                 'size': self.file_size,
@@ -118,10 +302,7 @@ class Message(db.Model):
             }
         
         # Adaugam atasamentele (fisiere multiple)
-        attachments_list = []
-        for att in self.attachments:
-            attachments_list.append(att.to_dict(current_user_id))
-        result['attachments'] = attachments_list
+        result['attachments'] = [att.to_dict(str_uid) for att in self.attachments]
         
         return result
     
@@ -138,19 +319,8 @@ class Message(db.Model):
         """
         base_dict = self.to_dict(current_user_id)
         
-        # Adaugam informatii despre procesul de criptare
-        base_dict['crypto_info'] = {
-            'encryption_algorithm': 'AES-256-CBC',
-            'key_exchange': 'RSA-2048',
-            'iv_size_bytes': 16,
-            'aes_key_size_bits': 256,
-            'description_ro': (
-                'Mesajul este criptat cu AES-256 in mod CBC. '
-                'Cheia AES este generata aleator pentru fiecare mesaj si '
-                'este criptata cu cheia publica RSA a fiecarui destinatar. '
-                'Doar destinatarii pot decripta cheia AES cu cheile lor private.'
-            )
-        }
+        # Adaugam informatii despre procesul de criptare (constante, construite o singura data)
+        base_dict['crypto_info'] = CRYPTO_INFO_GCM if base_dict['cipher_suite'] == CIPHER_SUITE_GCM else CRYPTO_INFO
         
         return base_dict
     
@@ -5,6 +5,15 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from . import db
+try:
+    # argon2-cffi: Argon2id (memory-hard), mai rapid decat pbkdf2 la securitate egala
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+except ImportError:  # pragma: no cover - fallback pe hash-urile werkzeug (pbkdf2)
+    PasswordHasher = None
+
+# Parametrii Argon2id pentru parolele noi
+_password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2) if PasswordHasher else None
 
 
 class User(db.Model):
@@ -20,7 +29,7 @@ class User(db.Model):
         id: Identificator unic
         username: Nume utilizator unic pentru login si cautare
         email: Adresa email unica
-        password_hash: Hash bcrypt al parolei
+        password_hash: Hash-ul parolei (Argon2id; pbkdf2 werkzeug pentru conturile vechi)
         public_key: Cheia publica RSA in format PEM (vizibila pentru toti)
         private_key_encrypted: Cheia privata RSA criptata cu parola utilizatorului
         avatar_color: Culoare pentru avatar generat
@@ -50,32 +59,52 @@ class User(db.Model):
     
     # Relatii
     # Mesajele trimise de acest utilizator
-    sent_messages = db.relationship('Message', backref='sender', lazy='dynamic',
+    sent_messages = db.relationship('Message', back_populates='sender', lazy='dynamic',
                                     foreign_keys='Message.sender_id')
     # Participarile la conversatii
     participations = db.relationship('ConversationParticipant', backref='user', lazy='dynamic')
     
     def set_password(self, password):
         """
-        Seteaza parola utilizatorului folosind hash bcrypt.
+        Seteaza parola utilizatorului folosind hash Argon2id
+        (sau pbkdf2 werkzeug daca argon2-cffi nu este instalat).
         Nu stocam parola in clar pentru securitate.
         
         Args:
             password: Parola in text clar
         """
-        self.password_hash = generate_password_hash(password)
+        if _password_hasher:
+            self.password_hash = _password_hasher.hash(password)
+        else:
+            self.password_hash = generate_password_hash(password)
     
     def check_password(self, password):
         """
         Verifica daca parola introdusa corespunde cu hash-ul stocat.
         
+        Hash-urile vechi (werkzeug) sunt migrate la Argon2id la prima
+        verificare reusita; apelantul trebuie sa faca commit.
+        
         Args:
             password: Parola de verificat
             
         Returns:
             bool: True daca parola este corecta
         """
-        return check_password_hash(self.password_hash, password)
+        if _password_hasher and self.password_hash.startswith('$argon2'):
+            try:
+                _password_hasher.verify(self.password_hash, password)
+            except (VerificationError, InvalidHashError):
+                return False
+            if _password_hasher.check_needs_rehash(self.password_hash):
+                self.set_password(password)
+            return True
+        
+        if not check_password_hash(self.password_hash, password):
+            return False
+        if _password_hasher:
+            self.set_password(password)
+        return True
     
     def update_last_seen(self):
         """
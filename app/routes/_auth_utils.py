@@ -0,0 +1,36 @@
+# routes/_auth_utils.py
+# Utilitare de autentificare comune tuturor blueprint-urilor
+# Un singur decorator login_required pentru auth, chat si fisiere
+
+from flask import jsonify, session, g
+from functools import wraps
+
+
+def login_required(f):
+    """
+    Decorator pentru verificarea autentificarii.
+    
+    Citeste sesiunea o singura data si pastreaza ID-ul utilizatorului
+    in flask.g, de unde il ia get_current_user_id().
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        user_id = session.get('user_id')
+        if user_id is None:
+            return jsonify({'error': 'Autentificare necesara'}), 401
+        g.user_id = user_id
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def get_current_user_id():
+    """
+    Obtine ID-ul utilizatorului curent.
+    
+    In rutele protejate de login_required este citit din flask.g;
+    in rest, direct din sesiune.
+    """
+    user_id = g.get('user_id')
+    if user_id is None:
+        user_id = session.get('user_id')
+    return user_id
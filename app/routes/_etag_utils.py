@@ -0,0 +1,22 @@
+# routes/_etag_utils.py
+# Utilitare pentru raspunsuri conditionate (ETag / If-None-Match)
+
+from flask import request
+
+# Flask-Compress adauga algoritmul la ETag-ul raspunsurilor comprimate
+# ("abc" -> "abc:br"); clientul ne trimite inapoi varianta primita
+COMPRESSED_ETAG_SUFFIXES = ('br', 'gzip', 'deflate')
+
+
+def etag_matches(etag):
+    """
+    Verifica daca clientul are deja versiunea etag (header If-None-Match).
+    
+    Accepta si variantele comprimate ale aceluiasi ETag.
+    """
+    if_none_match = request.if_none_match
+    if not if_none_match:
+        return False
+    if if_none_match.contains(etag):
+        return True
+    return any(if_none_match.contains(f'{etag}:{suffix}') for suffix in COMPRESSED_ETAG_SUFFIXES)
@@ -0,0 +1,41 @@
+# routes/_rate_limit.py
+# Limitare a ratei pentru endpoint-urile interogate periodic (polling)
+#
+# Flask-Limiter cu stocare in Redis (REDIS_URL) - contor comun tuturor
+# proceselor; fara Redis, contoare in memoria procesului.
+
+from flask import request
+from ._auth_utils import get_current_user_id
+
+try:
+    from flask_limiter import Limiter
+except ImportError:  # pragma: no cover - flask-limiter este optional
+    Limiter = None
+
+
+def rate_limit_key():
+    """
+    Cheia contorului: utilizatorul autentificat, altfel adresa IP.
+    
+    Limitele sunt verificate inainte de login_required, deci ID-ul
+    este citit din sesiune (get_current_user_id).
+    """
+    user_id = get_current_user_id()
+    if user_id is not None:
+        return f'user:{user_id}'
+    return f'ip:{request.remote_addr}'
+
+
+# Stocarea si comportamentul sunt citite din configurare (RATELIMIT_*) la init_app
+limiter = Limiter(key_func=rate_limit_key) if Limiter is not None else None
+
+
+def rate_limit(limit_value):
+    """
+    Decorator pentru limitarea unei rute (ex: '60/minute').
+    
+    Fara flask-limiter instalat, ruta ramane nelimitata.
+    """
+    if limiter is None:
+        return lambda f: f
+    return limiter.limit(limit_value)
@@ -2,9 +2,12 @@
 # Rute API pentru autentificare
 # Endpoints: register, login, logout, profil utilizator, cautare utilizatori
 
-from flask import Blueprint, request, jsonify, session
-from functools import wraps
+import json
+import hashlib
+from flask import Blueprint, Response, request, jsonify, session
 from services import AuthService, CryptoService
+from ._auth_utils import login_required, get_current_user_id
+from ._etag_utils import etag_matches
 
 # Cream blueprint-ul pentru autentificare
 auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
@@ -13,23 +16,20 @@ auth_bp = Blueprint('auth', __name__, url_prefix='/api/auth')
 auth_service = AuthService()
 crypto_service = CryptoService()
 
+# Raspunsurile care nu se schimba (chei publice, info criptare) sunt validate
+# prin ETag; browser-ul le pastreaza o ora, apoi primeste 304 fara continut
+_CACHE_MAX_AGE = 3600
 
-def login_required(f):
-    """
-    Decorator pentru verificarea autentificarii.
-    Verifica daca utilizatorul este autentificat prin sesiune.
-    """
-    @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Autentificare necesara'}), 401
-        return f(*args, **kwargs)
-    return decorated_function
+# Informatiile despre criptare sunt statice - ETag calculat o singura data
+_CRYPTO_INFO_ETAG = hashlib.sha256(
+    json.dumps(crypto_service.get_encryption_info(), sort_keys=True).encode('utf-8')
+).hexdigest()[:16]
 
 
 def get_current_user():
     """
-    Obtine utilizatorul curent din sesiune.
+    Obtine utilizatorul curent din sesiune (obiectul complet, cu cheile RSA).
+    Folosit doar de endpoint-urile care returneaza profilul propriu.
     
     Returns:
         User sau None
@@ -40,6 +40,30 @@ def get_current_user():
     return None
 
 
+def etag_response(etag, build_payload):
+    """
+    Raspuns JSON conditionat de ETag.
+    
+    Daca clientul trimite If-None-Match cu acelasi ETag, raspunde 304
+    fara a construi si serializa payload-ul.
+    
+    Args:
+        etag: ETag-ul (strong) al continutului
+        build_payload: Functie care construieste dict-ul raspunsului
+        
+    Returns:
+        Response
+    """
+    if etag_matches(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = _CACHE_MAX_AGE
+    return response
+
+
 # ==================== ENDPOINTS AUTENTIFICARE ====================
 
 @auth_bp.route('/register', methods=['POST'])
@@ -208,8 +232,7 @@ def search_users():
     query = request.args.get('q', '').strip()
     limit = min(int(request.args.get('limit', 10)), 20)
     
-    current_user = get_current_user()
-    users = auth_service.search_users(query, current_user.id, limit)
+    users = auth_service.search_users(query, get_current_user_id(), limit)
     
     return jsonify({
         'users': [user.to_dict() for user in users]
@@ -258,7 +281,9 @@ def get_user_public_key(user_id):
     if not user.public_key:
         return jsonify({'error': 'Utilizatorul nu are cheie publica configurata'}), 404
     
-    return jsonify({
+    etag = hashlib.sha256(user.public_key.encode('utf-8')).hexdigest()[:16]
+    
+    return etag_response(etag, lambda: {
         'public_key': user.public_key,
         'username': user.username,
         'info': {
@@ -283,10 +308,9 @@ def update_profile():
     }
     """
     data = request.get_json()
-    current_user = get_current_user()
     
     result = auth_service.update_user_profile(
-        current_user.id,
+        get_current_user_id(),
         avatar_color=data.get('avatar_color')
     )
     
@@ -312,10 +336,9 @@ def change_password():
     }
     """
     data = request.get_json()
-    current_user = get_current_user()
     
     result = auth_service.change_password(
-        current_user.id,
+        get_current_user_id(),
         data.get('old_password', ''),
         data.get('new_password', '')
     )
@@ -337,4 +360,4 @@ def get_crypto_info():
     Obtine informatii despre algoritmii de criptare folositi.
     Endpoint educational pentru afisarea in UI.
     """
-    return jsonify(crypto_service.get_encryption_info())
+    return etag_response(_CRYPTO_INFO_ETAG, crypto_service.get_encryption_info)
@@ -2,11 +2,22 @@
 # Rute API pentru upload si download fisiere criptate
 # Suporta fisiere multiple per mesaj
 
-from flask import Blueprint, request, jsonify, session, send_file
+import os
+import threading
+import unicodedata
 from functools import wraps
+from urllib.parse import quote
+from flask import Blueprint, Response, current_app, request, jsonify, send_file
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import joinedload
 from io import BytesIO
-from services import FileService, ChatService, AuthService
-from models import Message, MessageAttachment, db
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+from services import FileService, ChatService
+from ._auth_utils import login_required, get_current_user_id
+from ._etag_utils import etag_matches
+from services.file_service import b64encode_chunks
+from models import Conversation, Message, MessageAttachment, db
 
 # Cream blueprint-ul pentru fisiere
 file_bp = Blueprint('files', __name__, url_prefix='/api/files')
@@ -14,22 +25,191 @@ file_bp = Blueprint('files', __name__, url_prefix='/api/files')
 # Instantiem serviciile
 file_service = FileService()
 chat_service = ChatService()
-auth_service = AuthService()
 
 
-def login_required(f):
-    """Decorator pentru verificarea autentificarii."""
+class _UploadExecutor:
+    """
+    Pool de thread-uri pentru criptarea fisierelor - OpenSSL elibereaza GIL-ul,
+    deci upload-urile cu mai multe fisiere se cripteaza in paralel.
+    
+    Pool-ul este creat la primul upload, nu la importul modulului. Thread-urile
+    nu supravietuiesc fork-ului: dupa fork (workeri Gunicorn cu --preload),
+    copilul porneste fara pool si isi creeaza propriul pool la primul upload.
+    """
+    
+    def __init__(self, max_workers):
+        """
+        Args:
+            max_workers: Numarul maxim de thread-uri de criptare
+        """
+        self.max_workers = max_workers
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        self._executor = None
+        self._lock = threading.Lock()
+    
+    def map(self, fn, iterable):
+        """
+        Ca ThreadPoolExecutor.map (ordinea rezultatelor se pastreaza).
+        
+        Fiecare task ruleaza in contextul aplicatiei curente (configurare,
+        sesiunea bazei de date); contextul cererii nu este disponibil in
+        thread-uri, deci datele din request se transmit ca argumente.
+        """
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='file-encrypt')
+        app = current_app._get_current_object()
+        
+        def run(item):
+            with app.app_context():
+                return fn(item)
+        
+        return self._executor.map(run, iterable)
+
+
+upload_executor = _UploadExecutor(Config.FILE_ENCRYPTION_WORKERS)
+
+
+# Mesajul impreuna cu conversatia si participantii ei (verificarea accesului)
+_MESSAGE_WITH_CONTEXT = select(Message).where(
+    Message.id == bindparam('message_id')
+).options(
+    joinedload(Message.conversation).joinedload(Conversation.participants)
+)
+
+# Atasamentul impreuna cu mesajul, conversatia si participantii - un singur query
+_ATTACHMENT_WITH_CONTEXT = select(MessageAttachment).where(
+    MessageAttachment.id == bindparam('attachment_id')
+).options(
+    joinedload(MessageAttachment.message)
+    .joinedload(Message.conversation)
+    .joinedload(Conversation.participants)
+)
+
+
+# Metadatele fisierelor nu se modifica dupa creare; raspunsurile depind de
+# utilizator (cheia AES criptata pentru el), deci sunt cache-uite doar privat
+_METADATA_MAX_AGE = 3600
+
+
+def immutable_metadata_response(etag, build_payload):
+    """
+    Raspuns JSON pentru metadate imutabile per utilizator: 304 daca clientul
+    are deja ETag-ul, altfel payload-ul, cu Cache-Control private + max-age.
+    """
+    if etag_matches(etag):
+        response = Response(status=304)
+    else:
+        response = jsonify(build_payload())
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.max_age = _METADATA_MAX_AGE
+    return response
+
+
+def _has_access(message, user_id):
+    """Verifica (pe participantii deja incarcati) ca utilizatorul este in conversatia mesajului."""
+    return any(p.user_id == user_id for p in message.conversation.participants)
+
+
+def load_message_for_user(message_id, user_id):
+    """
+    Incarca un mesaj si verifica accesul utilizatorului, intr-un singur query.
+    
+    Returns:
+        tuple: (message, None) sau (None, raspuns de eroare 404/403)
+    """
+    message = db.session.scalars(_MESSAGE_WITH_CONTEXT, {'message_id': message_id}).unique().first()
+    if not message:
+        return None, (jsonify({'error': 'Mesaj negasit'}), 404)
+    if not _has_access(message, user_id):
+        return None, (jsonify({'error': 'Acces interzis'}), 403)
+    return message, None
+
+
+def load_attachment_for_user(attachment_id, user_id):
+    """
+    Incarca un atasament si verifica accesul utilizatorului, intr-un singur query
+    (in loc de atasament, mesaj si conversatie incarcate pe rand).
+    
+    Returns:
+        tuple: (attachment, None) sau (None, raspuns de eroare 404/403)
+    """
+    attachment = db.session.scalars(_ATTACHMENT_WITH_CONTEXT, {'attachment_id': attachment_id}).unique().first()
+    if not attachment:
+        return None, (jsonify({'error': 'Atasament negasit'}), 404)
+    if not attachment.message:
+        return None, (jsonify({'error': 'Mesaj negasit'}), 404)
+    if not _has_access(attachment.message, user_id):
+        return None, (jsonify({'error': 'Acces interzis'}), 403)
+    return attachment, None
+
+
+def attachment_access_required(f):
+    """
+    Decorator pentru rutele /<attachment_id>: incarca atasamentul cu
+    load_attachment_for_user si verifica ca exista o cheie AES criptata
+    pentru utilizatorul curent.
+    
+    Ruta primeste (attachment, encrypted_aes_key) in locul ID-ului.
+    Se aplica dupa login_required.
+    """
     @wraps(f)
-    def decorated_function(*args, **kwargs):
-        if 'user_id' not in session:
-            return jsonify({'error': 'Autentificare necesara'}), 401
-        return f(*args, **kwargs)
+    def decorated_function(attachment_id):
+        user_id = get_current_user_id()
+        attachment, error = load_attachment_for_user(attachment_id, user_id)
+        if error:
+            return error
+        
+        # Harta cheilor este parsata o singura data per atasament
+        encrypted_aes_key = attachment.encrypted_keys.get(str(user_id))
+        if not encrypted_aes_key:
+            return jsonify({'error': 'Nu ai acces la acest fisier'}), 403
+        return f(attachment, encrypted_aes_key)
     return decorated_function
 
 
-def get_current_user_id():
-    """Obtine ID-ul utilizatorului curent din sesiune."""
-    return session.get('user_id')
+def attachment_response(chunks, mimetype, file_name):
+    """
+    Raspuns de download pentru un fisier decriptat in flux.
+    
+    Bucatile sunt trimise pe masura ce sunt decriptate; Content-Disposition
+    este construit ca in send_file (filename* pentru nume non-ASCII).
+    """
+    response = Response(chunks, mimetype=mimetype)
+    try:
+        file_name.encode('ascii')
+        names = {'filename': file_name}
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize('NFKD', file_name).encode('ascii', 'ignore').decode('ascii')
+        names = {'filename': simple, 'filename*': f"UTF-8''{quote(file_name, safe='!#$&+^`|')}"}
+    response.headers.set('Content-Disposition', 'attachment', **names)
+    return response
+
+
+def upload_too_large():
+    """
+    Verifica Content-Length inainte de citirea formularului: corpurile peste
+    MAX_CONTENT_LENGTH (MAX_UPLOAD_BYTES plus antetele multipart) sunt
+    respinse fara a fi citite sau criptate.
+    """
+    content_length = request.content_length
+    return content_length is not None and content_length > Config.MAX_CONTENT_LENGTH
+
+
+def uploaded_size(file):
+    """Dimensiunea unui fisier din formular, citita din stream-ul deja primit."""
+    stream = file.stream
+    position = stream.tell()
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(position)
+    return size
 
 
 @file_bp.route('/upload/<int:conversation_id>', methods=['POST'])
@@ -62,9 +242,12 @@ def upload_files(conversation_id):
     """
     user_id = get_current_user_id()
     
-    # Verificam accesul la conversatie
-    conversation = chat_service.get_conversation(conversation_id, user_id)
-    if not conversation:
+    if upload_too_large():
+        return jsonify({'error': 'Fisierele depasesc dimensiunea maxima permisa'}), 413
+    
+    # Verificam accesul la conversatie (cheile publice ale participantilor vin in acelasi query)
+    bundle = chat_service.get_conversation_bundle(conversation_id, user_id)
+    if not bundle:
         return jsonify({'error': 'Conversatie negasita sau acces interzis'}), 404
     
     # Verificam daca exista fisiere
@@ -79,22 +262,28 @@ def upload_files(conversation_id):
     if not files or files[0].filename == '':
         return jsonify({'error': 'Niciun fisier furnizat'}), 400
     
-    # Obtinem cheile publice ale participantilor
-    participant_ids = [p.user_id for p in conversation.participants]
-    public_keys = auth_service.get_public_keys_for_users(participant_ids)
+    # Totalul exact al fisierelor (inclusiv clientii fara Content-Length), inainte de criptare
+    files = [file for file in files if file.filename != '']
+    if sum(uploaded_size(file) for file in files) > Config.MAX_UPLOAD_BYTES:
+        return jsonify({'error': 'Fisierele depasesc dimensiunea maxima permisa'}), 413
+    
+    # Cheile publice ale participantilor (incarcati in acelasi JOIN cu conversatia)
+    public_keys = bundle['public_keys']
     
-    if len(public_keys) != len(participant_ids):
+    if len(public_keys) != len(bundle['conversation'].participants):
         return jsonify({'error': 'Nu toti participantii au chei publice'}), 400
     
-    # Procesam fiecare fisier
+    # O singura cheie AES per upload, criptata RSA o data per participant
+    message_key = file_service.create_message_key(public_keys)
+    
+    # Uploadam si criptam fisierele in paralel (ordinea rezultatelor se pastreaza)
+    upload_results = upload_executor.map(
+        lambda file: file_service.upload_file(file, public_keys, message_key), files
+    )
+    
+    # Procesam rezultatul fiecarui fisier
     uploaded_files = []
-    for file in files:
-        if file.filename == '':
-            continue
-            
-        # Uploadam si criptam fisierul
-        upload_result = file_service.upload_file(file, public_keys)
-        
+    for upload_result in upload_results:
         if not upload_result['success']:
             # Continuam cu celelalte fisiere daca unul esueaza
             continue
@@ -119,7 +308,7 @@ def upload_files(conversation_id):
         'success': True,
         'uploaded_files': uploaded_files,
         'crypto_info': {
-            'algorithm': 'AES-256-CBC',
+            'algorithm': 'AES-256-GCM',
             'key_exchange': 'RSA-2048'
         }
     }), 201
@@ -245,45 +434,38 @@ def send_message_with_files(conversation_id):
     if not content and attachments_data:
         content = ''  # Nu mai setam numele fisierului ca text
     
+    # Atasamentele mesajului - salvate de send_message in aceeasi tranzactie
+    attachments = [
+        MessageAttachment(
+            file_name=att_data.get('name', 'file'),
+            file_path=att_data.get('encrypted_path', ''),
+            file_size=att_data.get('size', 0),
+            file_mime_type=att_data.get('mime_type', 'application/octet-stream'),
+            file_type=att_data.get('file_type', 'other'),
+            # encrypted_aes_keys poate fi dict sau string
+            encrypted_aes_keys=MessageAttachment.build_encrypted_keys(att_data.get('encrypted_aes_keys', {})),
+            iv=att_data.get('iv', '')
+        )
+        for att_data in attachments_data
+    ]
+    
     # Trimitem mesajul
     message_result = chat_service.send_message(
         conversation_id,
         user_id,
         content,
-        message_type
+        message_type,
+        attachments=attachments
     )
     
     if not message_result['success']:
         return jsonify({'error': message_result['error']}), 400
     
-    message = message_result['message']
-    
-    # Adaugam atasamentele la mesaj
-    import json
-    for att_data in attachments_data:
-        # encrypted_aes_keys poate fi dict sau string
-        enc_keys = att_data.get('encrypted_aes_keys', {})
-        if isinstance(enc_keys, str):
-            enc_keys_str = enc_keys
-        else:
-            enc_keys_str = json.dumps(enc_keys)
-        
-        attachment = MessageAttachment(
-            message_id=message.id,
-            file_name=att_data.get('name', 'file'),
-            file_path=att_data.get('encrypted_path', ''),
-            file_size=att_data.get('size', 0),
-            file_mime_type=att_data.get('mime_type', 'application/octet-stream'),
-            file_type=att_data.get('file_type', 'other'),
-            encrypted_aes_keys=enc_keys_str,
-            iv=att_data.get('iv', '')
-        )
-        db.session.add(attachment)
-    
-    db.session.commit()
-    
-    # Refresh message to load attachments
-    db.session.refresh(message)
+    # Mesajul si atasamentele lui, reincarcate dupa commit intr-un singur query
+    message = db.session.get(
+        Message, message_result['message'].id,
+        options=[joinedload(Message.attachments)], populate_existing=True
+    )
     
     return jsonify({
         'success': True,
@@ -293,7 +475,8 @@ def send_message_with_files(conversation_id):
 
 @file_bp.route('/download/<int:attachment_id>', methods=['POST'])
 @login_required
-def download_attachment(attachment_id):
+@attachment_access_required
+def download_attachment(attachment, encrypted_aes_key):
     """
     Descarca si decripteaza un atasament.
     
@@ -304,40 +487,14 @@ def download_attachment(attachment_id):
     
     Response: Fisierul decriptat (binary)
     """
-    user_id = get_current_user_id()
     data = request.get_json()
     
     private_key = data.get('private_key')
     if not private_key:
         return jsonify({'error': 'Cheia privata este necesara'}), 400
     
-    # Obtinem atasamentul
-    attachment = MessageAttachment.query.get(attachment_id)
-    if not attachment:
-        return jsonify({'error': 'Atasament negasit'}), 404
-    
-    # Verificam accesul la conversatie
-    message = Message.query.get(attachment.message_id)
-    if not message:
-        return jsonify({'error': 'Mesaj negasit'}), 404
-        
-    conversation = chat_service.get_conversation(message.conversation_id, user_id)
-    if not conversation:
-        return jsonify({'error': 'Acces interzis'}), 403
-    
-    # Obtinem cheia AES criptata pentru utilizatorul curent
-    import json
-    try:
-        encrypted_keys = json.loads(attachment.encrypted_aes_keys)
-        encrypted_aes_key = encrypted_keys.get(str(user_id))
-    except Exception:
-        encrypted_aes_key = None
-    
-    if not encrypted_aes_key:
-        return jsonify({'error': 'Nu ai acces la acest fisier'}), 403
-    
-    # Decriptam fisierul
-    result = file_service.download_file(
+    # Decriptam fisierul in flux (memorie O(bucata), nu O(fisier))
+    result = file_service.stream_decrypted_file(
         attachment.file_path,
         encrypted_aes_key,
         attachment.iv,
@@ -348,11 +505,10 @@ def download_attachment(attachment_id):
         return jsonify({'error': result['error']}), 400
     
     # Returnam fisierul decriptat
-    return send_file(
-        BytesIO(result['data']),
-        mimetype=attachment.file_mime_type or 'application/octet-stream',
-        as_attachment=True,
-        download_name=attachment.file_name or 'file'
+    return attachment_response(
+        result['stream'],
+        attachment.file_mime_type or 'application/octet-stream',
+        attachment.file_name or 'file'
     )
 
 
@@ -370,13 +526,10 @@ def download_file_legacy(message_id):
     if not private_key:
         return jsonify({'error': 'Cheia privata este necesara'}), 400
     
-    message = Message.query.get(message_id)
-    if not message:
-        return jsonify({'error': 'Mesaj negasit'}), 404
-    
-    conversation = chat_service.get_conversation(message.conversation_id, user_id)
-    if not conversation:
-        return jsonify({'error': 'Acces interzis'}), 403
+    # Mesajul si participantii conversatiei intr-un singur query
+    message, error = load_message_for_user(message_id, user_id)
+    if error:
+        return error
     
     if message.message_type not in ['image', 'file'] or not message.file_path:
         return jsonify({'error': 'Mesajul nu contine un fisier'}), 400
@@ -385,7 +538,7 @@ def download_file_legacy(message_id):
     if not encrypted_aes_key:
         return jsonify({'error': 'Nu ai acces la acest fisier'}), 403
     
-    result = file_service.download_file(
+    result = file_service.stream_decrypted_file(
         message.file_path,
         encrypted_aes_key,
         message.iv,
@@ -395,56 +548,30 @@ def download_file_legacy(message_id):
     if not result['success']:
         return jsonify({'error': result['error']}), 400
     
-    return send_file(
-        BytesIO(result['data']),
-        mimetype=message.file_mime_type or 'application/octet-stream',
-        as_attachment=True,
-        download_name=message.file_name or 'file'
+    return attachment_response(
+        result['stream'],
+        message.file_mime_type or 'application/octet-stream',
+        message.file_name or 'file'
     )
 
 
-@file_bp.route('/image/<int:attachment_id>', methods=['POST'])
-@login_required
-def get_image(attachment_id):
+def stream_image(attachment, encrypted_aes_key):
     """
-    Obtine imaginea decriptata pentru afisare inline.
-    Returneaza base64 pentru a fi afisata direct in browser.
+    Verificarile comune rutelor de imagine si decriptarea in flux.
+    
+    Returns:
+        tuple: (generator de bucati decriptate, None) sau (None, raspuns de eroare)
     """
-    user_id = get_current_user_id()
     data = request.get_json()
     
     private_key = data.get('private_key')
     if not private_key:
-        return jsonify({'error': 'Cheia privata este necesara'}), 400
-    
-    attachment = MessageAttachment.query.get(attachment_id)
-    if not attachment:
-        return jsonify({'error': 'Atasament negasit'}), 404
+        return None, (jsonify({'error': 'Cheia privata este necesara'}), 400)
     
     if attachment.file_type != 'image':
-        return jsonify({'error': 'Atasamentul nu este o imagine'}), 400
-    
-    message = Message.query.get(attachment.message_id)
-    if not message:
-        return jsonify({'error': 'Mesaj negasit'}), 404
-        
-    conversation = chat_service.get_conversation(message.conversation_id, user_id)
-    if not conversation:
-        return jsonify({'error': 'Acces interzis'}), 403
-    
-    import json
-    import base64
+        return None, (jsonify({'error': 'Atasamentul nu este o imagine'}), 400)
     
-    try:
-        encrypted_keys = json.loads(attachment.encrypted_aes_keys)
-        encrypted_aes_key = encrypted_keys.get(str(user_id))
-    except:
-        encrypted_aes_key = None
-    
-    if not encrypted_aes_key:
-        return jsonify({'error': 'Nu ai acces la aceasta imagine'}), 403
-    
-    result = file_service.download_file(
+    result = file_service.stream_decrypted_file(
         attachment.file_path,
         encrypted_aes_key,
         attachment.iv,
@@ -452,23 +579,67 @@ def get_image(attachment_id):
     )
     
     if not result['success']:
-        return jsonify({'error': result['error']}), 400
+        return None, (jsonify({'error': result['error']}), 400)
     
-    # Returnam imaginea ca base64
-    image_base64 = base64.b64encode(result['data']).decode('utf-8')
+    return result['stream'], None
+
+
+@file_bp.route('/image/<int:attachment_id>', methods=['POST'])
+@login_required
+@attachment_access_required
+def get_image(attachment, encrypted_aes_key):
+    """
+    Obtine imaginea decriptata pentru afisare inline.
+    Returneaza base64 pentru a fi afisata direct in browser.
     
-    return jsonify({
-        'success': True,
-        'image_data': f"data:{attachment.file_mime_type};base64,{image_base64}",
-        'file_name': attachment.file_name
-    })
+    Pentru imagini mari, /image/<id>/raw evita base64 (+33% trafic si o
+    trecere de codificare).
+    """
+    stream, error = stream_image(attachment, encrypted_aes_key)
+    if error:
+        return error
+    
+    # Returnam imaginea ca base64, in flux: decriptare -> base64 -> raspuns,
+    # fara buffere intermediare de marimea imaginii
+    # Antetul este serializat prin provider-ul JSON al aplicatiei (orjson),
+    # iar toate bucatile sunt bytes - trimise de WSGI fara re-codificare
+    dumps = current_app.json.dumps
+    head = ('{"success":true,"file_name":' + dumps(attachment.file_name) + ','
+            '"image_data":' + dumps(f"data:{attachment.file_mime_type};base64,")[:-1])
+    
+    def image_json():
+        yield head.encode('utf-8')
+        yield from b64encode_chunks(stream)
+        yield b'"}'
+    
+    return Response(image_json(), mimetype='application/json')
+
+
+@file_bp.route('/image/<int:attachment_id>/raw', methods=['POST'])
+@login_required
+@attachment_access_required
+def get_image_raw(attachment, encrypted_aes_key):
+    """
+    Obtine imaginea decriptata ca binar (Content-Type-ul imaginii).
+    
+    Clientul o afiseaza printr-un Blob / object URL; fata de /image/<id>
+    nu exista codificare base64 si nici JSON in jurul datelor.
+    """
+    stream, error = stream_image(attachment, encrypted_aes_key)
+    if error:
+        return error
+    
+    response = Response(stream, mimetype=attachment.file_mime_type or 'application/octet-stream')
+    response.headers['Cache-Control'] = 'no-store'
+    return response
 
 
 # ==================== ENDPOINTS PENTRU DECRIPTARE CLIENT-SIDE (E2E) ====================
 
 @file_bp.route('/encrypted/<int:attachment_id>', methods=['GET'])
 @login_required
-def get_encrypted_file(attachment_id):
+@attachment_access_required
+def get_encrypted_file(attachment, encrypted_aes_key):
     """
     Descarca fisierul criptat (fara decriptare).
     Decriptarea se face pe client pentru end-to-end encryption.
@@ -476,45 +647,42 @@ def get_encrypted_file(attachment_id):
     Returneaza fisierul criptat ca binary.
     Clientul trebuie sa obtina cheia AES de la /meta/<attachment_id>
     """
-    user_id = get_current_user_id()
-    
-    attachment = MessageAttachment.query.get(attachment_id)
-    if not attachment:
-        return jsonify({'error': 'Atasament negasit'}), 404
-    
-    message = Message.query.get(attachment.message_id)
-    if not message:
-        return jsonify({'error': 'Mesaj negasit'}), 404
-        
-    conversation = chat_service.get_conversation(message.conversation_id, user_id)
-    if not conversation:
-        return jsonify({'error': 'Acces interzis'}), 403
-    
-    # Verificam ca utilizatorul are acces la fisier
-    import json
-    try:
-        encrypted_keys = json.loads(attachment.encrypted_aes_keys)
-        if str(user_id) not in encrypted_keys:
-            return jsonify({'error': 'Nu ai acces la acest fisier'}), 403
-    except:
-        return jsonify({'error': 'Eroare la verificarea accesului'}), 500
+    # Ciphertext-ul brut este trimis direct de pe disc (wsgi.file_wrapper /
+    # sendfile), cu Content-Length si ETag - clientii care il au primesc 304,
+    # iar cererile Range primesc 206 cu Accept-Ranges/Content-Range
+    full_path = file_service.get_raw_encrypted_path(attachment.file_path)
+    if full_path:
+        response = send_file(
+            full_path,
+            mimetype='application/octet-stream',
+            as_attachment=False,
+            conditional=True,
+            etag=True
+        )
+        response.cache_control.private = True
+        return response
     
-    # Citim fisierul criptat
+    # Fisierele vechi (base64) sunt decodate in memorie; conditional=True
+    # raspunde si aici la cererile Range cu 206 (dimensiunea BytesIO este cunoscuta)
     result = file_service.get_encrypted_file(attachment.file_path)
     
     if not result['success']:
         return jsonify({'error': result['error']}), 404
     
-    return send_file(
+    response = send_file(
         BytesIO(result['data']),
         mimetype='application/octet-stream',
-        as_attachment=False
+        as_attachment=False,
+        conditional=True
     )
+    response.cache_control.private = True
+    return response
 
 
 @file_bp.route('/meta/<int:attachment_id>', methods=['GET'])
 @login_required
-def get_attachment_meta(attachment_id):
+@attachment_access_required
+def get_attachment_meta(attachment, encrypted_aes_key):
     """
     Obtine metadatele unui atasament necesare pentru decriptare client-side.
     
@@ -530,29 +698,7 @@ def get_attachment_meta(attachment_id):
     """
     user_id = get_current_user_id()
     
-    attachment = MessageAttachment.query.get(attachment_id)
-    if not attachment:
-        return jsonify({'error': 'Atasament negasit'}), 404
-    
-    message = Message.query.get(attachment.message_id)
-    if not message:
-        return jsonify({'error': 'Mesaj negasit'}), 404
-        
-    conversation = chat_service.get_conversation(message.conversation_id, user_id)
-    if not conversation:
-        return jsonify({'error': 'Acces interzis'}), 403
-    
-    import json
-    try:
-        encrypted_keys = json.loads(attachment.encrypted_aes_keys)
-        encrypted_aes_key = encrypted_keys.get(str(user_id))
-    except:
-        encrypted_aes_key = None
-    
-    if not encrypted_aes_key:
-        return jsonify({'error': 'Nu ai acces la acest fisier'}), 403
-    
-    return jsonify({
+    return immutable_metadata_response(f'meta-{attachment.id}-{user_id}', lambda: {
         'success': True,
         'encrypted_aes_key': encrypted_aes_key,
         'iv': attachment.iv,
@@ -591,29 +737,25 @@ def get_file_info(message_id):
     """
     user_id = get_current_user_id()
     
-    message = Message.query.get(message_id)
-    if not message:
-        return jsonify({'error': 'Mesaj negasit'}), 404
-    
-    # Verificam accesul
-    conversation = chat_service.get_conversation(message.conversation_id, user_id)
-    if not conversation:
-        return jsonify({'error': 'Acces interzis'}), 403
+    # Mesajul si participantii conversatiei intr-un singur query
+    message, error = load_message_for_user(message_id, user_id)
+    if error:
+        return error
     
     if message.message_type not in ['image', 'file']:
         return jsonify({'error': 'Mesajul nu contine un fisier'}), 400
     
-    return jsonify({
+    return immutable_metadata_response(f'info-{message.id}-{user_id}', lambda: {
         'file_info': {
             'name': message.file_name,
             'size': message.file_size,
             'mime_type': message.file_mime_type,
             'type': message.message_type,
-            'created_at': message.created_at.isoformat() if message.created_at else None
+            'created_at': message.created_at_iso
         },
         'crypto_info': {
             'is_encrypted': True,
-            'algorithm': 'AES-256-CBC',
+            'algorithm': message.cipher_suite,
             'key_exchange': 'RSA-2048',
             'can_decrypt': message.get_encrypted_key_for_user(user_id) is not None
         }
@@ -6,9 +6,73 @@
 # - Single Responsibility: doar autentificare si gestionare useri
 # - Dependency Inversion: depinde de interfata CryptoService
 
+import os
+import time
+import random
+import hashlib
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from models import db, User
+from sqlalchemy import bindparam, select
+from sqlalchemy.orm import aliased
+from models import db, User, Message, ConversationParticipant
 from .crypto_service import CryptoService
+from .cache_service import response_cache
+
+
+# Participantii (conversation_id, user_id) tuturor conversatiilor unui utilizator
+_own_participation = aliased(ConversationParticipant)
+_CONVERSATION_MEMBERSHIPS = select(
+    ConversationParticipant.conversation_id, ConversationParticipant.user_id
+).join(
+    _own_participation,
+    _own_participation.conversation_id == ConversationParticipant.conversation_id
+).where(
+    _own_participation.user_id == bindparam('user_id')
+)
+
+
+class _VerifiedPasswordCache:
+    """
+    Cache scurt (TTL) pentru verificarile de parola reusite.
+    
+    Hash-ul parolei (Argon2/pbkdf2) costa zeci de ms; login-urile repetate
+    in fereastra TTL sunt confirmate printr-un lookup. Se cache-uiesc doar
+    succesele, cheia este un BLAKE2b cu cheie aleatorie per proces peste
+    (user_id, password_hash, parola) - schimbarea parolei invalideaza intrarea.
+    """
+    
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._key = os.urandom(32)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _digest(self, user, password):
+        data = f'{user.id}\0{user.password_hash}\0{password}'.encode('utf-8')
+        return hashlib.blake2b(data, key=self._key, digest_size=16).digest()
+    
+    def check(self, user, password):
+        """Returneaza True daca parola a fost verificata cu succes recent."""
+        digest = self._digest(user, password)
+        with self._lock:
+            expires = self._entries.get(digest)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[digest]
+                return False
+            return True
+    
+    def add(self, user, password):
+        """Memoreaza o verificare reusita pentru urmatoarele ttl secunde."""
+        digest = self._digest(user, password)
+        with self._lock:
+            self._entries[digest] = time.monotonic() + self.ttl
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
 
 
 class AuthService:
@@ -26,14 +90,17 @@ class AuthService:
     - Cheia privata este stocata criptat sau trimisa utilizatorului pentru stocare locala
     """
     
-    def __init__(self, crypto_service=None):
+    def __init__(self, crypto_service=None, cache=None):
         """
         Initializeaza serviciul de autentificare.
         
         Args:
             crypto_service: Instanta CryptoService (dependency injection)
+            cache: Instanta ResponseCache (implicit cea comuna rutelor)
         """
         self.crypto_service = crypto_service or CryptoService()
+        self.cache = cache or response_cache
+        self.verified_passwords = _VerifiedPasswordCache()
     
     def register(self, username, email, password):
         """
@@ -68,12 +135,14 @@ class AuthService:
         if not password or len(password) < 6:
             return {'success': False, 'error': 'Parola trebuie sa aiba minim 6 caractere'}
         
-        # Verificam daca username-ul exista deja
-        if User.query.filter_by(username=username).first():
+        # Verificam unicitatea username-ului si a email-ului intr-un singur query (doar coloanele)
+        existing = db.session.query(User.username, User.email).filter(
+            (User.username == username) |
+            (User.email == email)
+        ).all()
+        if any(row.username == username for row in existing):
             return {'success': False, 'error': 'Numele de utilizator este deja folosit'}
-        
-        # Verificam daca email-ul exista deja
-        if User.query.filter_by(email=email).first():
+        if existing:
             return {'success': False, 'error': 'Adresa de email este deja inregistrata'}
         
         try:
@@ -81,7 +150,6 @@ class AuthService:
             private_key_pem, public_key_pem = self.crypto_service.generate_rsa_key_pair()
             
             # Generam o culoare aleatorie pentru avatar
-            import random
             colors = ['#3B82F6', '#10B981', '#F59E0B', '#EF4444', '#8B5CF6', '#EC4899', '#06B6D4']
             avatar_color = random.choice(colors)
             
@@ -134,13 +202,20 @@ class AuthService:
         if not user:
             return {'success': False, 'error': 'Utilizator negasit'}
         
-        if not user.check_password(password):
-            return {'success': False, 'error': 'Parola incorecta'}
+        if not self.verified_passwords.check(user, password):
+            if not user.check_password(password):
+                return {'success': False, 'error': 'Parola incorecta'}
+            # check_password poate rescrie hash-ul (migrare la Argon2id) - salvat la commit
+            self.verified_passwords.add(user, password)
         
         # Actualizam last_seen
         user.update_last_seen()
         db.session.commit()
         
+        # Incarcam cheia privata in cache-ul RSA pentru decriptarile din sesiune
+        if user.private_key_encrypted:
+            self.crypto_service.preload_private_key(user.private_key_encrypted)
+        
         return {
             'success': True,
             'user': user,
@@ -222,6 +297,12 @@ class AuthService:
                     setattr(user, field, value)
             
             db.session.commit()
+            
+            # Mesajele afiseaza avatar_color din cache-ul de expeditori
+            Message.forget_sender(user.id)
+            # Conversatiile serializate (ale partenerilor) contin profilul participantilor
+            memberships = db.session.execute(_CONVERSATION_MEMBERSHIPS, {'user_id': user.id}).all()
+            self.cache.invalidate_conversations(memberships)
             return {'success': True, 'user': user}
             
         except Exception as e:
@@ -253,6 +334,10 @@ class AuthService:
         try:
             user.set_password(new_password)
             db.session.commit()
+            
+            # Cheia privata parsata nu mai ramane in cache dupa schimbarea parolei
+            if user.private_key_encrypted:
+                self.crypto_service.forget_private_key(user.private_key_encrypted)
             return {'success': True, 'message': 'Parola schimbata cu succes'}
             
         except Exception as e:
@@ -284,5 +369,9 @@ class AuthService:
         Returns:
             dict: {user_id: public_key_pem}
         """
-        users = User.query.filter(User.id.in_(user_ids)).all()
-        return {user.id: user.public_key for user in users if user.public_key}
+        # Doar coloanele necesare - fara cheile private criptate si hash-urile parolelor
+        rows = db.session.query(User.id, User.public_key).filter(
+            User.id.in_(user_ids),
+            User.public_key.isnot(None)
+        ).all()
+        return {user_id: public_key for user_id, public_key in rows if public_key}
@@ -0,0 +1,202 @@
+# services/cache_service.py
+# Cache pentru raspunsurile interogate des de client (polling)
+# Lista conversatiilor si numarul de mesaje necitite, per utilizator
+#
+# Backend: Redis daca REDIS_URL este configurat si pachetul redis este instalat
+# (cache comun tuturor proceselor), altfel un dict cu TTL in procesul curent.
+
+import time
+import threading
+from collections import OrderedDict
+from config import Config
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis este optional
+    redis = None
+
+
+class _LocalStore:
+    """
+    Subset minimal din API-ul Redis (get/mget/setex/delete) tinut in memorie.
+    Folosit cand Redis nu este disponibil (dezvoltare, un singur proces).
+    
+    Intrarile sunt pastrate in ordinea scrierii: la fiecare setex sunt sterse
+    cele expirate de la inceput (TTL-ul este acelasi pentru toate cheile,
+    deci cele mai vechi expira primele), iar peste maxsize sunt eliminate
+    cele mai vechi - memoria ramane limitata oricati utilizatori trec prin proces.
+    """
+    
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+    
+    def mget(self, keys):
+        return [self.get(key) for key in keys]
+    
+    def setex(self, key, ttl, value):
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now + ttl)
+            self._entries.move_to_end(key)
+            while self._entries:
+                _, expires = next(iter(self._entries.values()))
+                if expires >= now and len(self._entries) <= self.maxsize:
+                    break
+                self._entries.popitem(last=False)
+    
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class ResponseCache:
+    """
+    Cache per utilizator pentru GET /conversations si GET /unread-count.
+    
+    Pe langa lista completa, fiecare conversatie serializata este pastrata
+    separat (per conversatie si utilizator): cand lista este invalidata de
+    un mesaj nou, doar conversatia modificata este serializata din nou.
+    
+    Intrarile expira dupa TTL si sunt sterse explicit de ChatService la
+    orice modificare (mesaj nou, conversatie creata/stearsa, marcare citit)
+    si de AuthService la modificarea profilului, pentru toti participantii
+    afectati. Erorile Redis sunt tratate ca miss - cererea ajunge la baza de date.
+    """
+    
+    TTL = 30  # Secunde
+    
+    def __init__(self, url=None):
+        """
+        Args:
+            url: URL Redis (implicit Config.REDIS_URL); fara URL, cache in proces
+        """
+        url = url if url is not None else Config.REDIS_URL
+        if url and redis is not None:
+            # Clientul foloseste intern un connection pool; conexiunea se deschide la prima comanda
+            self.store = redis.Redis.from_url(url)
+            self._errors = (redis.RedisError,)
+        else:
+            self.store = _LocalStore()
+            self._errors = ()
+    
+    @staticmethod
+    def _conversations_key(user_id):
+        return f'conv:{user_id}'
+    
+    @staticmethod
+    def _unread_key(user_id):
+        return f'unread:{user_id}'
+    
+    @staticmethod
+    def _conversation_key(conversation_id, user_id):
+        return f'convdict:{conversation_id}:{user_id}'
+    
+    def _get(self, key):
+        try:
+            return self.store.get(key)
+        except self._errors:
+            return None
+    
+    def _set(self, key, value):
+        try:
+            self.store.setex(key, self.TTL, value)
+        except self._errors:
+            pass
+    
+    def get_conversations(self, user_id):
+        """Returneaza JSON-ul serializat al listei de conversatii sau None."""
+        return self._get(self._conversations_key(user_id))
+    
+    def set_conversations(self, user_id, payload):
+        """Memoreaza JSON-ul serializat al listei de conversatii."""
+        self._set(self._conversations_key(user_id), payload)
+    
+    def get_conversation_dicts(self, user_id, conversation_ids):
+        """
+        Returneaza JSON-ul serializat al fiecarei conversatii (None la miss),
+        in ordinea conversation_ids, printr-o singura comanda MGET.
+        """
+        if not conversation_ids:
+            return []
+        keys = [self._conversation_key(cid, user_id) for cid in conversation_ids]
+        try:
+            return self.store.mget(keys)
+        except self._errors:
+            return [None] * len(keys)
+    
+    def set_conversation_dicts(self, user_id, blobs):
+        """
+        Memoreaza conversatiile serializate.
+        
+        Args:
+            user_id: ID utilizator
+            blobs: Dict {conversation_id: JSON serializat}
+        """
+        for conversation_id, blob in blobs.items():
+            self._set(self._conversation_key(conversation_id, user_id), blob)
+    
+    def get_unread_count(self, user_id):
+        """Returneaza numarul de mesaje necitite din cache sau None."""
+        value = self._get(self._unread_key(user_id))
+        return int(value) if value is not None else None
+    
+    def set_unread_count(self, user_id, count):
+        """Memoreaza numarul de mesaje necitite."""
+        self._set(self._unread_key(user_id), count)
+    
+    def invalidate(self, user_ids, conversation_id=None):
+        """
+        Sterge intrarile utilizatorilor afectati de o modificare.
+        
+        Args:
+            user_ids: ID-urile utilizatorilor (participantii conversatiei)
+            conversation_id: Conversatia modificata (sterge si forma ei serializata)
+        """
+        keys = []
+        for user_id in user_ids:
+            keys.append(self._conversations_key(user_id))
+            keys.append(self._unread_key(user_id))
+            if conversation_id is not None:
+                keys.append(self._conversation_key(conversation_id, user_id))
+        self._delete(keys)
+    
+    def invalidate_conversations(self, memberships):
+        """
+        Sterge forma serializata a mai multor conversatii si listele
+        participantilor lor (ex: profilul unui participant s-a schimbat).
+        Numarul de mesaje necitite nu este afectat.
+        
+        Args:
+            memberships: Perechi (conversation_id, user_id) - participantii conversatiilor
+        """
+        keys = set()
+        for conversation_id, user_id in memberships:
+            keys.add(self._conversations_key(user_id))
+            keys.add(self._conversation_key(conversation_id, user_id))
+        self._delete(list(keys))
+    
+    def _delete(self, keys):
+        if not keys:
+            return
+        try:
+            self.store.delete(*keys)
+        except self._errors:
+            pass
+
+
+# Instanta comuna rutelor, ChatService si AuthService
+response_cache = ResponseCache()
@@ -7,12 +7,76 @@
 # - Dependency Inversion: depinde de CryptoService pentru criptare
 
 from datetime import datetime
-from models import db, User, Conversation, ConversationParticipant, Message
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.orm import aliased, defer, joinedload, selectinload
+from models import db, User, Conversation, ConversationParticipant, Message, MessageAttachment
 from .crypto_service import CryptoService
 from .auth_service import AuthService
+from .cache_service import response_cache
+from .event_service import event_service
 import json
 
 
+# Pagina de mesaje dintr-o conversatie, cele mai noi primele. Atasamentele vin
+# intr-un singur query selectin; expeditorii din Message.preload_senders (fara JOIN users)
+_MESSAGES_PAGE = select(Message).where(
+    Message.conversation_id == bindparam('conversation_id')
+).options(
+    selectinload(Message.attachments)
+).order_by(Message.created_at.desc()).limit(bindparam('limit'))
+
+# Aceeasi pagina, pentru paginare inapoi (mesaje mai vechi decat before_id)
+_MESSAGES_PAGE_BEFORE = _MESSAGES_PAGE.where(Message.id < bindparam('before_id'))
+
+# Versiunea mesajelor unei conversatii: cel mai mare ID de mesaj si de atasament
+# (mesajele nu se editeaza; atasamentele se adauga dupa mesaj) si profilul
+# participantilor (username, avatar_color - afisate la fiecare mesaj). Doar
+# pentru participanti - altfel query-ul nu intoarce niciun rand.
+_MESSAGES_VERSION = select(
+    select(func.max(Message.id)).where(
+        Message.conversation_id == bindparam('conversation_id')
+    ).scalar_subquery(),
+    select(func.max(MessageAttachment.id)).join(
+        Message, Message.id == MessageAttachment.message_id
+    ).where(
+        Message.conversation_id == bindparam('conversation_id')
+    ).scalar_subquery(),
+    # aggregate_strings: group_concat (SQLite/MySQL) sau string_agg (PostgreSQL)
+    select(func.aggregate_strings(
+        User.username + ':' + func.coalesce(User.avatar_color, ''), ','
+    )).join(
+        ConversationParticipant, ConversationParticipant.user_id == User.id
+    ).where(
+        ConversationParticipant.conversation_id == bindparam('conversation_id')
+    ).scalar_subquery()
+).where(
+    select(ConversationParticipant.id).where(
+        ConversationParticipant.conversation_id == bindparam('conversation_id'),
+        ConversationParticipant.user_id == bindparam('user_id')
+    ).exists()
+)
+
+# Conversatia 1-la-1 dintre doi utilizatori (doua JOIN-uri pe participanti)
+_participant_a = aliased(ConversationParticipant)
+_participant_b = aliased(ConversationParticipant)
+_EXISTING_DIRECT_CONVERSATION = select(Conversation).join(
+    _participant_a, _participant_a.conversation_id == Conversation.id
+).join(
+    _participant_b, _participant_b.conversation_id == Conversation.id
+).where(
+    Conversation.is_group == False,
+    _participant_a.user_id == bindparam('user_a'),
+    _participant_b.user_id == bindparam('user_b')
+).limit(1)
+
+# ID-urile conversatiilor unui utilizator, cele mai recent active primele
+_USER_CONVERSATION_IDS = select(Conversation.id).join(
+    ConversationParticipant, ConversationParticipant.conversation_id == Conversation.id
+).where(
+    ConversationParticipant.user_id == bindparam('user_id')
+).order_by(Conversation.updated_at.desc(), Conversation.id.desc())
+
+
 class ChatService:
     """
     Serviciu pentru gestionarea conversatiilor si mesajelor criptate.
@@ -28,16 +92,20 @@ class ChatService:
     - Cheia AES e criptata cu RSA pentru fiecare participant
     """
     
-    def __init__(self, crypto_service=None, auth_service=None):
+    def __init__(self, crypto_service=None, auth_service=None, cache=None, events=None):
         """
         Initializeaza serviciul de chat.
         
         Args:
             crypto_service: Instanta CryptoService
             auth_service: Instanta AuthService
+            cache: Instanta ResponseCache (implicit cea comuna rutelor)
+            events: Instanta EventService (implicit cea comuna rutei /events)
         """
         self.crypto_service = crypto_service or CryptoService()
         self.auth_service = auth_service or AuthService()
+        self.cache = cache or response_cache
+        self.events = events or event_service
     
     # ==================== GESTIONARE CONVERSATII ====================
     
@@ -89,23 +157,18 @@ class ChatService:
                 }
         
         try:
-            # Cream conversatia
+            # Cream conversatia impreuna cu participantii: la commit, conversatia
+            # este inserata prima, iar participantii intr-un singur INSERT multi-rand
             conversation = Conversation(
                 name=name if is_group else None,
-                is_group=is_group
+                is_group=is_group,
+                participants=[ConversationParticipant(user_id=user_id) for user_id in participant_ids]
             )
             db.session.add(conversation)
-            db.session.flush()  # Pentru a obtine ID-ul
-            
-            # Adaugam participantii
-            for user_id in participant_ids:
-                participant = ConversationParticipant(
-                    conversation_id=conversation.id,
-                    user_id=user_id
-                )
-                db.session.add(participant)
             
             db.session.commit()
+            self.cache.invalidate(participant_ids)
+            self.events.publish(participant_ids, 'conversation', conversation_id=conversation.id)
             
             return {
                 'success': True,
@@ -128,23 +191,13 @@ class ChatService:
         Returns:
             Conversation sau None
         """
-        # Pentru conversatii 1-la-1
+        # Pentru conversatii 1-la-1: un singur query, conversatia non-grup in care
+        # participa ambii utilizatori (fara incarcarea tuturor conversatiilor primului)
         if len(participant_ids) == 2:
-            # Gasim conversatiile in care participa primul utilizator
-            subq = db.session.query(ConversationParticipant.conversation_id).filter(
-                ConversationParticipant.user_id == participant_ids[0]
-            ).subquery()
-            
-            # Verificam daca exista o conversatie non-grup cu ambii participanti
-            conversations = Conversation.query.filter(
-                Conversation.id.in_(subq),
-                Conversation.is_group == False
-            ).all()
-            
-            for conv in conversations:
-                conv_participant_ids = set(p.user_id for p in conv.participants)
-                if conv_participant_ids == set(participant_ids):
-                    return conv
+            return db.session.scalars(_EXISTING_DIRECT_CONVERSATION, {
+                'user_a': participant_ids[0],
+                'user_b': participant_ids[1]
+            }).first()
         
         return None
     
@@ -159,18 +212,20 @@ class ChatService:
         Returns:
             dict: {'success': bool, 'error': mesaj eroare sau None}
         """
-        from models import MessageAttachment
-        
         # Verificam daca utilizatorul are acces la conversatie
         conversation = self.get_conversation(conversation_id, user_id)
         if not conversation:
             return {'success': False, 'error': 'Conversatie negasita sau acces interzis'}
         
+        participant_ids = [p.user_id for p in conversation.participants]
+        
         try:
-            # Stergem atasamentele mesajelor din aceasta conversatie
-            messages = Message.query.filter_by(conversation_id=conversation_id).all()
-            for message in messages:
-                MessageAttachment.query.filter_by(message_id=message.id).delete()
+            # Stergem atasamentele mesajelor din aceasta conversatie - un singur
+            # DELETE cu subquery, fara incarcarea mesajelor (atasamentele nu sunt in sesiune)
+            message_ids = select(Message.id).where(Message.conversation_id == conversation_id)
+            MessageAttachment.query.filter(
+                MessageAttachment.message_id.in_(message_ids)
+            ).delete(synchronize_session=False)
             
             # Stergem mesajele
             Message.query.filter_by(conversation_id=conversation_id).delete()
@@ -181,32 +236,50 @@ class ChatService:
             # Stergem conversatia
             db.session.delete(conversation)
             db.session.commit()
+            self.cache.invalidate(participant_ids, conversation_id)
+            self.events.publish(participant_ids, 'conversation', conversation_id=conversation_id)
             
             return {'success': True}
         except Exception as e:
             db.session.rollback()
             return {'success': False, 'error': f'Eroare la stergere: {str(e)}'}
     
-    def get_user_conversations(self, user_id):
+    def get_user_conversations(self, user_id, conversation_ids=None):
         """
         Obtine toate conversatiile unui utilizator, ordonate dupa activitate.
         
         Args:
             user_id: ID utilizator
+            conversation_ids: Doar aceste conversatii (optional, ex: cele lipsa din cache)
             
         Returns:
             list: Lista de conversatii cu ultimele mesaje
         """
-        # Gasim toate participarile utilizatorului
-        participations = ConversationParticipant.query.filter_by(user_id=user_id).all()
-        conversation_ids = [p.conversation_id for p in participations]
-        
-        # Obtinem conversatiile ordonate dupa updated_at (cele mai recente primele)
-        conversations = Conversation.query.filter(
-            Conversation.id.in_(conversation_ids)
-        ).order_by(Conversation.updated_at.desc()).all()
+        # Conversatiile utilizatorului, ordonate dupa updated_at (cele mai recente primele;
+        # la aceeasi secunda, cea mai noua conversatie).
+        # Participantii si utilizatorii lor sunt incarcati in acelasi query selectin,
+        # iar ultimele mesaje intr-un singur query - fara N+1 in to_dict
+        query = Conversation.query.join(
+            ConversationParticipant,
+            ConversationParticipant.conversation_id == Conversation.id
+        ).filter(
+            ConversationParticipant.user_id == user_id
+        )
+        if conversation_ids is not None:
+            query = query.filter(Conversation.id.in_(conversation_ids))
+        conversations = query.options(
+            selectinload(Conversation.participants).joinedload(ConversationParticipant.user)
+        ).order_by(Conversation.updated_at.desc(), Conversation.id.desc()).all()
+        
+        return Conversation.preload_last_messages(conversations)
+    
+    def get_user_conversation_ids(self, user_id):
+        """
+        ID-urile conversatiilor unui utilizator, in ordinea listei de conversatii.
         
-        return conversations
+        Un singur query pe coloane, fara incarcarea participantilor si a mesajelor.
+        """
+        return db.session.execute(_USER_CONVERSATION_IDS, {'user_id': user_id}).scalars().all()
     
     def get_conversation(self, conversation_id, user_id):
         """
@@ -219,22 +292,69 @@ class ChatService:
         Returns:
             Conversation sau None daca nu exista sau nu are acces
         """
-        conversation = Conversation.query.get(conversation_id)
+        # Conversatia si participantii intr-un singur query (JOIN); accesul
+        # se verifica pe lista incarcata, fara un query separat
+        return self._load_conversation(conversation_id, user_id, joinedload(Conversation.participants))
+    
+    def _load_conversation(self, conversation_id, user_id, *options):
+        """
+        Incarca o conversatie cu optiunile de eager loading date si verifica
+        ca utilizatorul este participant.
+        
+        Returns:
+            Conversation sau None daca nu exista sau nu are acces
+        """
+        conversation = Conversation.query.options(*options).filter(
+            Conversation.id == conversation_id
+        ).first()
         if not conversation:
             return None
         
-        # Verificam daca utilizatorul e participant
-        participant = ConversationParticipant.query.filter_by(
-            conversation_id=conversation_id,
-            user_id=user_id
-        ).first()
+        if not any(p.user_id == user_id for p in conversation.participants):
+            return None
+        return conversation
+    
+    def get_conversation_bundle(self, conversation_id, user_id):
+        """
+        Obtine conversatia impreuna cu informatiile de criptare si cheile
+        publice ale participantilor, dintr-un singur query.
         
-        return conversation if participant else None
+        Conversatia, participantii si utilizatorii lor vin in acelasi JOIN
+        (fara cheile private si hash-urile parolelor); rutele aleg partea
+        de care au nevoie.
+        
+        Args:
+            conversation_id: ID conversatie
+            user_id: ID utilizator (pentru verificare acces)
+            
+        Returns:
+            dict: {
+                'conversation': Conversation,
+                'crypto_info': informatii despre criptare,
+                'public_keys': {user_id: public_key_pem}
+            } sau None daca nu exista sau nu are acces
+        """
+        conversation = self._load_conversation(
+            conversation_id, user_id,
+            joinedload(Conversation.participants).joinedload(ConversationParticipant.user).options(
+                defer(User.private_key_encrypted),
+                defer(User.password_hash)
+            )
+        )
+        if not conversation:
+            return None
+        
+        users = [p.user for p in conversation.participants]
+        return {
+            'conversation': conversation,
+            'crypto_info': self._build_crypto_info(users),
+            'public_keys': {user.id: user.public_key for user in users if user.public_key}
+        }
     
     # ==================== GESTIONARE MESAJE ====================
     
     def send_message(self, conversation_id, sender_id, content, message_type='text', 
-                     file_info=None):
+                     file_info=None, attachments=None):
         """
         Trimite un mesaj criptat intr-o conversatie.
         
@@ -251,6 +371,8 @@ class ChatService:
             content: Continutul mesajului (va fi criptat)
             message_type: 'text', 'image', sau 'file'
             file_info: Dict cu informatii fisier (optional)
+            attachments: Lista MessageAttachment nesalvate (optional) - inserate
+                         in aceeasi tranzactie cu mesajul, intr-un singur INSERT
             
         Returns:
             dict: {
@@ -259,14 +381,15 @@ class ChatService:
                 'error': mesaj eroare sau None
             }
         """
-        # Verificam accesul la conversatie
-        conversation = self.get_conversation(conversation_id, sender_id)
-        if not conversation:
+        # Verificam accesul la conversatie; cheile publice ale participantilor
+        # vin in acelasi query
+        bundle = self.get_conversation_bundle(conversation_id, sender_id)
+        if not bundle:
             return {'success': False, 'error': 'Conversatie negasita sau acces interzis'}
         
-        # Obtinem cheile publice ale tuturor participantilor
+        conversation = bundle['conversation']
         participant_ids = [p.user_id for p in conversation.participants]
-        public_keys = self.auth_service.get_public_keys_for_users(participant_ids)
+        public_keys = bundle['public_keys']
         
         if len(public_keys) != len(participant_ids):
             return {'success': False, 'error': 'Nu toti participantii au chei publice configurate'}
@@ -294,23 +417,28 @@ class ChatService:
                 message.file_size = file_info.get('size')
                 message.file_mime_type = file_info.get('mime_type')
             
+            # Atasamentele sunt inserate la commit, dupa mesaj, intr-un singur
+            # INSERT multi-rand; evenimentul de mesaj nou pleaca dupa ce exista
+            if attachments:
+                message.attachments = list(attachments)
+            
             db.session.add(message)
             
             # Actualizam timestamp conversatie
             conversation.update_timestamp()
             
-            # Incrementam contorul de necitite pentru ceilalti participanti
-            for participant in conversation.participants:
-                if participant.user_id != sender_id:
-                    participant.increment_unread()
+            # Incrementam contorul de necitite pentru ceilalti participanti (un singur UPDATE)
+            ConversationParticipant.bulk_increment_unread(conversation_id, sender_id)
             
             db.session.commit()
+            self.cache.invalidate(participant_ids, conversation_id)
+            self.events.publish(participant_ids, 'message', conversation_id=conversation_id, sender_id=sender_id)
             
             return {
                 'success': True,
                 'message': message,
                 'crypto_details': {
-                    'algorithm_content': 'AES-256-CBC',
+                    'algorithm_content': encrypted_data['algorithm'],
                     'algorithm_key_exchange': 'RSA-2048',
                     'recipients_count': len(participant_ids)
                 }
@@ -371,12 +499,12 @@ class ChatService:
             # Actualizam timestamp conversatie
             conversation.update_timestamp()
             
-            # Incrementam contorul de necitite pentru ceilalti participanti
-            for participant in conversation.participants:
-                if participant.user_id != sender_id:
-                    participant.increment_unread()
+            # Incrementam contorul de necitite pentru ceilalti participanti (un singur UPDATE)
+            ConversationParticipant.bulk_increment_unread(conversation_id, sender_id)
             
             db.session.commit()
+            self.cache.invalidate(participant_ids, conversation_id)
+            self.events.publish(participant_ids, 'message', conversation_id=conversation_id, sender_id=sender_id)
             
             return {
                 'success': True,
@@ -402,22 +530,75 @@ class ChatService:
         Returns:
             list: Lista de mesaje (criptate)
         """
+        return self.get_messages_page(conversation_id, user_id, limit, before_id)['messages']
+    
+    def get_messages_page(self, conversation_id, user_id, limit=50, before_id=None):
+        """
+        Obtine o pagina de mesaje impreuna cu cursorul pentru pagina urmatoare.
+        
+        Se citesc limit+1 randuri: randul in plus arata daca mai exista mesaje
+        mai vechi (has_more corect si cand ultima pagina are exact limit mesaje).
+        
+        Args:
+            conversation_id: ID conversatie
+            user_id: ID utilizator (pentru verificare acces)
+            limit: Numar maxim de mesaje
+            before_id: Pentru paginare - mesaje inainte de acest ID
+            
+        Returns:
+            dict: {
+                'messages': lista de mesaje in ordine cronologica,
+                'has_more': bool - exista mesaje mai vechi,
+                'next_before': ID-ul pentru pagina urmatoare sau None
+            }
+        """
         # Verificam accesul
         conversation = self.get_conversation(conversation_id, user_id)
         if not conversation:
-            return []
-        
-        # Construim query-ul
-        query = Message.query.filter_by(conversation_id=conversation_id)
+            return {'messages': [], 'has_more': False, 'next_before': None}
         
+        # Statement-urile sunt construite o singura data (nivel modul); SQL-ul
+        # compilat este reutilizat din cache-ul engine-ului, doar parametrii difera
+        params = {'conversation_id': conversation_id, 'limit': limit + 1}
+        statement = _MESSAGES_PAGE
         if before_id:
-            query = query.filter(Message.id < before_id)
+            statement = _MESSAGES_PAGE_BEFORE
+            params['before_id'] = before_id
+        
+        messages = db.session.execute(statement, params).scalars().all()
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        Message.preload_senders(messages)
+        
+        # Returnam in ordine cronologica; cel mai vechi mesaj e cursorul paginii urmatoare
+        messages.reverse()
+        return {
+            'messages': messages,
+            'has_more': has_more,
+            'next_before': messages[0].id if has_more else None
+        }
+    
+    def get_messages_version(self, conversation_id, user_id):
+        """
+        Obtine un marcaj ieftin al starii mesajelor dintr-o conversatie.
         
-        # Ordonam descrescator si luam ultimele N mesaje
-        messages = query.order_by(Message.created_at.desc()).limit(limit).all()
+        Se schimba la orice mesaj sau atasament nou si la modificarea
+        profilului unui participant; folosit pentru ETag, ca polling-ul fara
+        mesaje noi sa primeasca 304 fara serializare.
         
-        # Returnam in ordine cronologica
-        return list(reversed(messages))
+        Args:
+            conversation_id: ID conversatie
+            user_id: ID utilizator (pentru verificare acces)
+            
+        Returns:
+            str: Versiunea sau None daca utilizatorul nu are acces
+        """
+        row = db.session.execute(
+            _MESSAGES_VERSION, {'conversation_id': conversation_id, 'user_id': user_id}
+        ).first()
+        if row is None:
+            return None
+        return f'{row[0]}.{row[1]}.{row[2]}'
     
     def mark_conversation_as_read(self, conversation_id, user_id):
         """
@@ -438,9 +619,17 @@ class ChatService:
         if not participant:
             return {'success': False, 'error': 'Nu esti participant in aceasta conversatie'}
         
+        # Cazul obisnuit (conversatie deja citita, tab redeschis): fara UPDATE,
+        # fara invalidarea cache-ului si fara eveniment
+        if not participant.unread_count:
+            return {'success': True}
+        
         try:
             participant.mark_as_read()
             db.session.commit()
+            self.cache.invalidate([user_id], conversation_id)
+            # Celelalte sesiuni ale utilizatorului actualizeaza badge-ul de necitite
+            self.events.publish([user_id], 'read', conversation_id=conversation_id)
             return {'success': True}
             
         except Exception as e:
@@ -509,6 +698,76 @@ class ChatService:
         except Exception as e:
             return {'success': False, 'error': f'Eroare la decriptare: {str(e)}'}
     
+    def decrypt_messages(self, message_ids, user_id, private_key_pem):
+        """
+        Decripteaza mai multe mesaje intr-un singur apel (istoric, scroll).
+        
+        Mesajele sunt citite cu un singur query IN, accesul se verifica o
+        singura data per conversatie, iar decriptarea ruleaza pe lot
+        (CryptoService.decrypt_messages).
+        
+        Args:
+            message_ids: Lista ID-uri mesaje
+            user_id: ID utilizator
+            private_key_pem: Cheia privata RSA a utilizatorului
+            
+        Returns:
+            list: Cate un dict per ID cerut, in aceeasi ordine: {
+                'message_id': int,
+                'success': bool,
+                'content': continut decriptat sau None,
+                'message_type': tipul mesajului (doar la succes),
+                'error': mesaj eroare (doar la esec)
+            }
+        """
+        messages = {
+            m.id: m for m in Message.query.filter(Message.id.in_(message_ids)).all()
+        }
+        allowed_conversations = {
+            conversation_id for (conversation_id,) in db.session.query(
+                ConversationParticipant.conversation_id
+            ).filter(
+                ConversationParticipant.user_id == user_id,
+                ConversationParticipant.conversation_id.in_({m.conversation_id for m in messages.values()})
+            )
+        }
+        
+        str_uid = str(user_id)
+        results = []
+        to_decrypt = []
+        for message_id in message_ids:
+            message = messages.get(message_id)
+            if not message:
+                results.append({'message_id': message_id, 'success': False, 'error': 'Mesaj negasit'})
+                continue
+            if message.conversation_id not in allowed_conversations:
+                results.append({'message_id': message_id, 'success': False, 'error': 'Nu ai acces la acest mesaj'})
+                continue
+            encrypted_aes_key = message.encrypted_keys.get(str_uid)
+            if not encrypted_aes_key:
+                results.append({'message_id': message_id, 'success': False, 'error': 'Nu exista cheie criptata pentru tine'})
+                continue
+            results.append(None)
+            to_decrypt.append((len(results) - 1, message, (message.encrypted_content, encrypted_aes_key, message.iv)))
+        
+        decrypted = self.crypto_service.decrypt_messages([item for _, _, item in to_decrypt], private_key_pem)
+        for (index, message, _), (content, error) in zip(to_decrypt, decrypted):
+            if error is None:
+                results[index] = {
+                    'message_id': message.id,
+                    'success': True,
+                    'content': content,
+                    'message_type': message.message_type
+                }
+            else:
+                results[index] = {
+                    'message_id': message.id,
+                    'success': False,
+                    'error': f'Eroare la decriptare: {error}'
+                }
+        
+        return results
+    
     # ==================== STATISTICI SI INFO ====================
     
     def get_unread_count(self, user_id):
@@ -521,8 +780,20 @@ class ChatService:
         Returns:
             int: Numar mesaje necitite
         """
-        participations = ConversationParticipant.query.filter_by(user_id=user_id).all()
-        return sum(p.unread_count for p in participations)
+        # Polling frecvent - raspunsul vine din cache pana la urmatoarea modificare
+        count = self.cache.get_unread_count(user_id)
+        if count is not None:
+            return count
+        
+        # Un singur SUM in baza de date; filtrul unread_count > 0 foloseste indexul partial ix_cp_unread
+        count = db.session.execute(
+            select(func.coalesce(func.sum(ConversationParticipant.unread_count), 0)).where(
+                ConversationParticipant.user_id == user_id,
+                ConversationParticipant.unread_count > 0
+            )
+        ).scalar()
+        self.cache.set_unread_count(user_id, count)
+        return count
     
     def get_conversation_crypto_info(self, conversation_id):
         """
@@ -535,12 +806,20 @@ class ChatService:
         Returns:
             dict: Informatii despre criptare
         """
-        conversation = Conversation.query.get(conversation_id)
+        # Participantii si utilizatorii lor in acelasi query, nu cate un SELECT per utilizator
+        conversation = Conversation.query.options(
+            joinedload(Conversation.participants).joinedload(ConversationParticipant.user).options(
+                defer(User.private_key_encrypted),
+                defer(User.password_hash)
+            )
+        ).filter(Conversation.id == conversation_id).first()
         if not conversation:
             return None
         
-        participants = [p.user for p in conversation.participants]
-        
+        return self._build_crypto_info([p.user for p in conversation.participants])
+    
+    def _build_crypto_info(self, participants):
+        """Construieste informatiile de criptare pentru lista de utilizatori participanti."""
         return {
             'participants_count': len(participants),
             'participants': [
@@ -3,7 +3,8 @@
 # Implementeaza schema hibrida AES+RSA pentru criptare end-to-end
 #
 # Schema de criptare:
-# - AES-256-CBC pentru criptarea continutului (rapid si eficient)
+# - AES-256-GCM pentru mesajele si fisierele noi (autentificat, paralelizabil)
+# - AES-256-CBC pentru mesajele/fisierele vechi si fisierele criptate pe client
 # - RSA-2048 pentru criptarea cheii AES (schimb securizat de chei)
 #
 # Principii SOLID aplicate:
@@ -12,13 +13,212 @@
 # - Interface Segregation: metode clare pentru fiecare operatie
 
 import os
-import base64
 import json
+import queue
+import hashlib
+import threading
 from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from cryptography.hazmat.primitives import hashes, padding, serialization
 from cryptography.hazmat.primitives.asymmetric import rsa, padding as asym_padding
 from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.backends import default_backend
+from fast_codecs import base64
+
+
+def _b64encode_str(data):
+    """Codifica base64 direct in str (pybase64 evita conversia bytes -> str)."""
+    if hasattr(base64, 'b64encode_as_string'):
+        return base64.b64encode_as_string(data)
+    return base64.b64encode(data).decode('utf-8')
+
+
+@lru_cache(maxsize=None)
+def cpu_has_aes_instructions():
+    """
+    Verifica daca procesorul expune instructiunile AES (AES-NI / ARMv8 AES).
+    
+    OpenSSL le foloseste automat prin interfata EVP cand exista.
+    
+    Returns:
+        bool sau None daca nu se poate determina (sistem fara /proc/cpuinfo)
+    """
+    try:
+        with open('/proc/cpuinfo') as cpuinfo:
+            for line in cpuinfo:
+                if line.startswith(('flags', 'Features')):
+                    return 'aes' in line.split()
+    except OSError:
+        pass
+    return None
+
+
+# Padding OAEP (SHA-256) - acelasi obiect pentru toate operatiile RSA
+_OAEP = asym_padding.OAEP(
+    mgf=asym_padding.MGF1(algorithm=hashes.SHA256()),
+    algorithm=hashes.SHA256(),
+    label=None
+)
+
+
+def _pem_bytes(key_pem):
+    return key_pem.encode('utf-8') if isinstance(key_pem, str) else key_pem
+
+
+@lru_cache(maxsize=1024)
+def _load_public_key(public_key_pem):
+    """Parseaza o cheie publica PEM o singura data; apelurile urmatoare sunt lookup-uri."""
+    return serialization.load_pem_public_key(_pem_bytes(public_key_pem), backend=default_backend())
+
+
+# Operatiile RSA pe loturi (criptarea cheii AES pentru grupuri mari, decriptarea
+# unei pagini de mesaje) se impart pe thread-uri: OpenSSL elibereaza GIL-ul in
+# timpul operatiei RSA. Sub prag, costul trimiterii in pool depaseste castigul.
+_RSA_WORKERS = os.cpu_count() or 1
+_RSA_PARALLEL_MIN = 4
+_rsa_executor = ThreadPoolExecutor(max_workers=_RSA_WORKERS, thread_name_prefix='rsa')
+
+
+# Cache LRU pentru cheile private parsate. Cheia cache-ului este un hash
+# BLAKE2b al PEM-ului, ca textul cheii private sa nu fie pastrat in memorie
+_PRIVATE_KEY_CACHE_SIZE = 1024
+_private_keys = OrderedDict()
+_private_keys_lock = threading.Lock()
+
+
+def _private_key_digest(private_key_pem):
+    return hashlib.blake2b(_pem_bytes(private_key_pem), digest_size=16).digest()
+
+
+def _load_private_key(private_key_pem):
+    """Parseaza o cheie privata PEM o singura data; apelurile urmatoare sunt lookup-uri."""
+    digest = _private_key_digest(private_key_pem)
+    with _private_keys_lock:
+        private_key = _private_keys.get(digest)
+        if private_key is not None:
+            _private_keys.move_to_end(digest)
+            return private_key
+    
+    private_key = serialization.load_pem_private_key(
+        _pem_bytes(private_key_pem), password=None, backend=default_backend()
+    )
+    with _private_keys_lock:
+        _private_keys[digest] = private_key
+        if len(_private_keys) > _PRIVATE_KEY_CACHE_SIZE:
+            _private_keys.popitem(last=False)
+    return private_key
+
+
+def _forget_private_key(private_key_pem):
+    """Elimina o cheie privata din cache (ex: la schimbarea parolei)."""
+    with _private_keys_lock:
+        _private_keys.pop(_private_key_digest(private_key_pem), None)
+
+
+def _pkcs7_pad(data, block_size):
+    """Padding PKCS7 intr-o singura concatenare (fara obiect padder per mesaj)."""
+    pad_len = block_size - len(data) % block_size
+    return data + bytes((pad_len,)) * pad_len
+
+
+def _create_rsa_key_pair(key_size):
+    """
+    Genereaza o pereche de chei RSA si o serializeaza in format PEM.
+    
+    Args:
+        key_size: Dimensiunea cheii in biti
+        
+    Returns:
+        tuple: (private_key_pem, public_key_pem)
+    """
+    # Generam cheia privata RSA
+    private_key = rsa.generate_private_key(
+        public_exponent=65537,  # Standard, numar prim Fermat F4
+        key_size=key_size,
+        backend=default_backend()
+    )
+    
+    # Extragem cheia publica din cea privata
+    public_key = private_key.public_key()
+    
+    # Serializam cheile in format PEM (text, usor de stocat)
+    private_key_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    ).decode('utf-8')
+    
+    public_key_pem = public_key.public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    ).decode('utf-8')
+    
+    return private_key_pem, public_key_pem
+
+
+class RsaKeyPool:
+    """
+    Rezerva de perechi de chei RSA pregenerate.
+    
+    Generarea unei chei RSA-2048 dureaza zeci-sute de ms si ar bloca
+    worker-ul care proceseaza inregistrarea. Un thread daemon tine coada
+    plina; o cerere doar scoate o pereche gata facuta. Daca rezerva e
+    goala (rafala de inregistrari), cheia se genereaza sincron.
+    
+    Thread-ul porneste la primul get() (prima inregistrare), nu la crearea
+    aplicatiei: procesul de monitorizare al reloader-ului Werkzeug si
+    master-ul Gunicorn --preload nu genereaza chei pe care nu le folosesc.
+    
+    Fiecare pereche este folosita o singura data. Dupa fork (workeri
+    Gunicorn cu --preload), copilul porneste cu rezerva goala: altfel
+    mai multi workeri ar distribui aceleasi chei mostenite.
+    """
+    
+    def __init__(self, key_size, size=8):
+        """
+        Args:
+            key_size: Dimensiunea cheilor generate (biti)
+            size: Numarul maxim de perechi tinute in rezerva
+        """
+        self.key_size = key_size
+        self.size = size
+        self._reset()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._reset)
+    
+    def _reset(self):
+        # Thread-ul de umplere nu supravietuieste fork-ului; get() il reporneste
+        self._keys = queue.Queue(maxsize=self.size)
+        self._thread = None
+        self._lock = threading.Lock()
+    
+    def start(self):
+        """Porneste (o singura data) thread-ul care umple rezerva."""
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._fill, name='rsa-keygen', daemon=True)
+                self._thread.start()
+    
+    def _fill(self):
+        # put() blocheaza cat timp coada e plina - regeneram doar ce s-a consumat
+        while True:
+            self._keys.put(_create_rsa_key_pair(self.key_size))
+    
+    def get(self):
+        """
+        Returneaza o pereche de chei noua.
+        
+        Returns:
+            tuple: (private_key_pem, public_key_pem)
+        """
+        self.start()
+        try:
+            return self._keys.get_nowait()
+        except queue.Empty:
+            return _create_rsa_key_pair(self.key_size)
 
 
 class ICryptoService(ABC):
@@ -71,7 +271,7 @@ class CryptoService(ICryptoService):
     
     2. CRIPTARE MESAJ:
        - Se genereaza o cheie AES-256 aleatorie pentru fiecare mesaj
-       - Mesajul este criptat cu AES-256-CBC
+       - Mesajul este criptat cu AES-256-GCM (mesajele vechi: AES-256-CBC)
        - Cheia AES este criptata cu cheia publica RSA a destinatarului
        - Se trimite: mesaj_criptat + cheie_AES_criptata + IV
     
@@ -89,6 +289,9 @@ class CryptoService(ICryptoService):
     RSA_KEY_SIZE = 2048  # Biti - recomandat minim pentru securitate
     AES_KEY_SIZE = 32    # Bytes = 256 biti
     AES_BLOCK_SIZE = 16  # Bytes = 128 biti (standard AES)
+    AES_GCM_NONCE_SIZE = 12  # Bytes = 96 biti (nonce recomandat pentru GCM)
+    AES_GCM_TAG_SIZE = 16  # Bytes - tag-ul de autentificare GCM
+    STREAM_CHUNK_SIZE = 64 * 1024  # Bytes cititi per pas la criptarea in flux
     
     def __init__(self):
         """
@@ -107,32 +310,15 @@ class CryptoService(ICryptoService):
         - Cheia publica: folosita pentru criptare, poate fi distribuita
         - Cheia privata: folosita pentru decriptare, trebuie pastrata secreta
         
+        Cheile sunt luate din rezerva pregenerata (rsa_key_pool), deci
+        apelul nu asteapta generarea decat daca rezerva este goala.
+        
         Returns:
             tuple: (private_key_pem, public_key_pem) - chei in format PEM
         """
-        # Generam cheia privata RSA
-        private_key = rsa.generate_private_key(
-            public_exponent=65537,  # Standard, numar prim Fermat F4
-            key_size=self.RSA_KEY_SIZE,
-            backend=self.backend
-        )
-        
-        # Extragem cheia publica din cea privata
-        public_key = private_key.public_key()
-        
-        # Serializam cheile in format PEM (text, usor de stocat)
-        private_key_pem = private_key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption()
-        ).decode('utf-8')
-        
-        public_key_pem = public_key.public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo
-        ).decode('utf-8')
-        
-        return private_key_pem, public_key_pem
+        if self.RSA_KEY_SIZE == rsa_key_pool.key_size:
+            return rsa_key_pool.get()
+        return _create_rsa_key_pair(self.RSA_KEY_SIZE)
     
     def generate_aes_key(self):
         """
@@ -196,8 +382,7 @@ class CryptoService(ICryptoService):
             iv = self.generate_iv()
         
         # Aplicam padding PKCS7 pentru a avea multiplu de block size
-        padder = padding.PKCS7(algorithms.AES.block_size).padder()
-        padded_data = padder.update(plaintext) + padder.finalize()
+        padded_data = _pkcs7_pad(plaintext, self.AES_BLOCK_SIZE)
         
         # Cream cipher-ul AES in mod CBC
         cipher = Cipher(
@@ -211,16 +396,55 @@ class CryptoService(ICryptoService):
         ciphertext = encryptor.update(padded_data) + encryptor.finalize()
         
         return {
-            'ciphertext': base64.b64encode(ciphertext).decode('utf-8'),
+            'ciphertext': _b64encode_str(ciphertext),
             'iv': base64.b64encode(iv).decode('utf-8'),
             'algorithm': 'AES-256-CBC'
         }
     
+    def encrypt_with_aes_gcm(self, plaintext, key, nonce=None):
+        """
+        Cripteaza date folosind AES-256 in mod GCM (criptare autentificata).
+        
+        Mod GCM (Galois/Counter Mode):
+        - Blocurile sunt criptate independent (mod contor), deci in paralel
+        - Nu necesita padding
+        - Tag-ul de autentificare (16 bytes) detecteaza orice modificare
+          a ciphertext-ului; este atasat la sfarsitul acestuia
+        
+        Args:
+            plaintext: Text de criptat (str sau bytes)
+            key: Cheie AES (bytes, 32 bytes pentru AES-256)
+            nonce: Nonce (bytes, 12 bytes) - optional, unic per cheie
+            
+        Returns:
+            dict: {
+                'ciphertext': date criptate + tag (base64),
+                'iv': nonce (base64),
+                'algorithm': 'AES-256-GCM'
+            }
+        """
+        if isinstance(plaintext, str):
+            plaintext = plaintext.encode('utf-8')
+        
+        if nonce is None:
+            nonce = os.urandom(self.AES_GCM_NONCE_SIZE)
+        
+        ciphertext = AESGCM(key).encrypt(nonce, plaintext, None)
+        
+        return {
+            'ciphertext': _b64encode_str(ciphertext),
+            'iv': base64.b64encode(nonce).decode('utf-8'),
+            'algorithm': 'AES-256-GCM'
+        }
+    
     def decrypt_with_aes(self, ciphertext_b64, key, iv_b64):
         """
-        Decripteaza date criptate cu AES-256-CBC.
+        Decripteaza date criptate cu AES-256-GCM sau AES-256-CBC.
+        
+        Modul este dedus din lungimea IV-ului: 12 bytes pentru GCM
+        (mesaje noi), 16 bytes pentru CBC (mesaje vechi).
         
-        Procesul invers al criptarii:
+        Procesul invers al criptarii (CBC):
         1. Decodifica base64
         2. Decripteaza cu AES-CBC folosind cheia si IV
         3. Elimina padding-ul PKCS7
@@ -241,6 +465,10 @@ class CryptoService(ICryptoService):
             ciphertext = base64.b64decode(ciphertext_b64)
             iv = base64.b64decode(iv_b64)
             
+            # GCM verifica tag-ul si decripteaza intr-un singur apel
+            if len(iv) == self.AES_GCM_NONCE_SIZE:
+                return AESGCM(key).decrypt(iv, ciphertext, None).decode('utf-8')
+            
             # Cream cipher-ul pentru decriptare
             cipher = Cipher(
                 algorithms.AES(key),
@@ -288,23 +516,13 @@ class CryptoService(ICryptoService):
         if isinstance(plaintext, str):
             plaintext = plaintext.encode('utf-8')
         
-        # Incarcam cheia publica din PEM
-        public_key = serialization.load_pem_public_key(
-            public_key_pem.encode('utf-8') if isinstance(public_key_pem, str) else public_key_pem,
-            backend=self.backend
-        )
+        # Incarcam cheia publica din PEM (parsata o singura data per cheie)
+        public_key = _load_public_key(public_key_pem)
         
         # Criptam cu OAEP padding
-        ciphertext = public_key.encrypt(
-            plaintext,
-            asym_padding.OAEP(
-                mgf=asym_padding.MGF1(algorithm=hashes.SHA256()),
-                algorithm=hashes.SHA256(),
-                label=None
-            )
-        )
+        ciphertext = public_key.encrypt(plaintext, _OAEP)
         
-        return base64.b64encode(ciphertext).decode('utf-8')
+        return _b64encode_str(ciphertext)
     
     def decrypt_with_rsa(self, ciphertext_b64, private_key_pem):
         """
@@ -327,28 +545,82 @@ class CryptoService(ICryptoService):
             # Decodam din base64
             ciphertext = base64.b64decode(ciphertext_b64)
             
-            # Incarcam cheia privata
-            private_key = serialization.load_pem_private_key(
-                private_key_pem.encode('utf-8') if isinstance(private_key_pem, str) else private_key_pem,
-                password=None,
-                backend=self.backend
-            )
+            # Incarcam cheia privata (parsata o singura data per cheie)
+            private_key = _load_private_key(private_key_pem)
             
             # Decriptam
-            plaintext = private_key.decrypt(
-                ciphertext,
-                asym_padding.OAEP(
-                    mgf=asym_padding.MGF1(algorithm=hashes.SHA256()),
-                    algorithm=hashes.SHA256(),
-                    label=None
-                )
-            )
+            plaintext = private_key.decrypt(ciphertext, _OAEP)
             
             return plaintext
             
         except Exception as e:
             raise ValueError(f"Eroare la decriptare RSA: {str(e)}")
     
+    def preload_private_key(self, private_key_pem):
+        """
+        Parseaza din timp cheia privata a unui utilizator (ex: la login).
+        
+        Obiectul cheii OpenSSL pastreaza parametrii CRT (p, q, dP, dQ, qInv),
+        deci decriptarile RSA ulterioare ale utilizatorului folosesc direct
+        cheia din cache, fara parsare pe calea critica.
+        
+        Args:
+            private_key_pem: Cheia privata RSA in format PEM
+            
+        Returns:
+            bool: True daca cheia a putut fi incarcata
+        """
+        try:
+            _load_private_key(private_key_pem)
+            return True
+        except (ValueError, TypeError):
+            return False
+    
+    def forget_private_key(self, private_key_pem):
+        """
+        Elimina cheia privata a unui utilizator din cache-ul de chei parsate.
+        
+        Args:
+            private_key_pem: Cheia privata RSA in format PEM
+        """
+        _forget_private_key(private_key_pem)
+    
+    def wrap_aes_key(self, aes_key, recipient_public_keys):
+        """
+        Cripteaza o cheie AES cu RSA pentru fiecare destinatar.
+        
+        Punct unic folosit de mesaje si fisiere: cheia AES se cripteaza
+        o singura data per destinatar, indiferent cate date protejeaza.
+        
+        Toate cheile publice ale lotului sunt rezolvate inainte de criptare;
+        obiectele cheie din cache pastreaza contextele Montgomery OpenSSL,
+        deci fiecare criptare RSA reutilizeaza setup-ul aritmetic. Pentru
+        grupuri de cel putin _RSA_PARALLEL_MIN destinatari, criptarile
+        ruleaza in paralel pe un pool de thread-uri.
+        
+        Args:
+            aes_key: Cheia AES (bytes)
+            recipient_public_keys: Dict {user_id: public_key_pem}
+            
+        Returns:
+            dict: {str(user_id): cheie_AES_criptata_RSA (base64)}
+        """
+        public_keys = [
+            (str(user_id), _load_public_key(public_key_pem))
+            for user_id, public_key_pem in recipient_public_keys.items()
+        ]
+        
+        def wrap(public_key):
+            # Acelasi obiect OAEP pentru tot lotul
+            return _b64encode_str(public_key.encrypt(aes_key, _OAEP))
+        
+        if _RSA_WORKERS > 1 and len(public_keys) >= _RSA_PARALLEL_MIN:
+            wrapped = _rsa_executor.map(wrap, [public_key for _, public_key in public_keys])
+        else:
+            wrapped = map(wrap, [public_key for _, public_key in public_keys])
+        
+        return {user_id: encrypted for (user_id, _), encrypted in zip(public_keys, wrapped)}
+    
     # ==================== OPERATII COMBINATE (SCHEMA HIBRIDA) ====================
     
     def encrypt_message_for_recipients(self, message, recipient_public_keys):
@@ -369,26 +641,26 @@ class CryptoService(ICryptoService):
             
         Returns:
             dict: {
-                'encrypted_content': mesaj criptat AES (base64),
-                'iv': vector initializare (base64),
-                'encrypted_aes_keys': {user_id: cheie_AES_criptata_RSA, ...}
+                'encrypted_content': mesaj criptat AES-GCM (base64),
+                'iv': nonce (base64),
+                'encrypted_aes_keys': {user_id: cheie_AES_criptata_RSA, ...},
+                'algorithm': 'AES-256-GCM'
             }
         """
         # Pas 1: Generam cheie AES pentru acest mesaj
         aes_key = self.generate_aes_key()
         
-        # Pas 2: Criptam mesajul cu AES
-        aes_result = self.encrypt_with_aes(message, aes_key)
+        # Pas 2: Criptam mesajul cu AES-GCM
+        aes_result = self.encrypt_with_aes_gcm(message, aes_key)
         
         # Pas 3: Criptam cheia AES pentru fiecare destinatar
-        encrypted_keys = {}
-        for user_id, public_key_pem in recipient_public_keys.items():
-            encrypted_keys[str(user_id)] = self.encrypt_with_rsa(aes_key, public_key_pem)
+        encrypted_keys = self.wrap_aes_key(aes_key, recipient_public_keys)
         
         return {
             'encrypted_content': aes_result['ciphertext'],
             'iv': aes_result['iv'],
-            'encrypted_aes_keys': encrypted_keys
+            'encrypted_aes_keys': encrypted_keys,
+            'algorithm': aes_result['algorithm']
         }
     
     def decrypt_message(self, encrypted_content, encrypted_aes_key, iv, private_key_pem):
@@ -414,6 +686,34 @@ class CryptoService(ICryptoService):
         # Pas 2: Decriptam mesajul
         return self.decrypt_with_aes(encrypted_content, aes_key, iv)
     
+    def decrypt_messages(self, items, private_key_pem):
+        """
+        Decripteaza un lot de mesaje ale aceluiasi utilizator.
+        
+        Cheia privata este parsata o singura data; decriptarile RSA (operatia
+        scumpa, ~1 ms per cheie) ruleaza in paralel pe pool-ul de thread-uri
+        pentru loturi de cel putin _RSA_PARALLEL_MIN mesaje.
+        
+        Args:
+            items: Lista de tupluri (encrypted_content, encrypted_aes_key, iv)
+            private_key_pem: Cheia privata RSA a utilizatorului
+            
+        Returns:
+            list: Tupluri (continut_decriptat, None) sau (None, mesaj_eroare),
+                  in ordinea din items
+        """
+        self.preload_private_key(private_key_pem)
+        
+        def decrypt(item):
+            try:
+                return self.decrypt_message(*item, private_key_pem), None
+            except Exception as e:
+                return None, str(e)
+        
+        if _RSA_WORKERS > 1 and len(items) >= _RSA_PARALLEL_MIN:
+            return list(_rsa_executor.map(decrypt, items))
+        return [decrypt(item) for item in items]
+    
     # ==================== CRIPTARE FISIERE ====================
     
     def encrypt_file(self, file_data, recipient_public_keys):
@@ -432,13 +732,11 @@ class CryptoService(ICryptoService):
         # Generam cheie AES
         aes_key = self.generate_aes_key()
         
-        # Criptam fisierul cu AES
-        aes_result = self.encrypt_with_aes(file_data, aes_key)
+        # Criptam fisierul cu AES-GCM
+        aes_result = self.encrypt_with_aes_gcm(file_data, aes_key)
         
         # Criptam cheia AES pentru fiecare destinatar
-        encrypted_keys = {}
-        for user_id, public_key_pem in recipient_public_keys.items():
-            encrypted_keys[str(user_id)] = self.encrypt_with_rsa(aes_key, public_key_pem)
+        encrypted_keys = self.wrap_aes_key(aes_key, recipient_public_keys)
         
         return {
             'encrypted_content': aes_result['ciphertext'],
@@ -446,12 +744,65 @@ class CryptoService(ICryptoService):
             'encrypted_aes_keys': encrypted_keys
         }
     
+    def encrypt_stream(self, source, destination, key, nonce=None, chunk_size=None):
+        """
+        Cripteaza un flux de date (fisier) cu AES-256-GCM, bucata cu bucata.
+        
+        Spre deosebire de encrypt_with_aes, continutul nu este incarcat
+        integral in memorie: se citesc bucati de STREAM_CHUNK_SIZE bytes,
+        se cripteaza cu encryptor.update() si se scriu imediat in destinatie.
+        Apelurile OpenSSL elibereaza GIL-ul, deci mai multe fisiere pot fi
+        criptate in paralel din thread-uri diferite.
+        
+        Formatul este cel al mesajelor GCM (si al Web Crypto API): ciphertext
+        urmat de tag-ul de 16 bytes, nonce de 12 bytes.
+        
+        Args:
+            source: Obiect cu metoda read() (ex: FileStorage.stream)
+            destination: Obiect cu metoda write() pentru ciphertext
+            key: Cheie AES (bytes, 32 bytes pentru AES-256)
+            nonce: Nonce (bytes, 12 bytes) - optional, unic per cheie
+            chunk_size: Dimensiunea unei bucati citite (bytes) - optional
+            
+        Returns:
+            dict: {
+                'iv': nonce (base64),
+                'size': numarul de bytes necriptati cititi,
+                'algorithm': 'AES-256-GCM'
+            }
+        """
+        if nonce is None:
+            nonce = os.urandom(self.AES_GCM_NONCE_SIZE)
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        
+        encryptor = Cipher(
+            algorithms.AES(key),
+            modes.GCM(nonce),
+            backend=self.backend
+        ).encryptor()
+        
+        size = 0
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            destination.write(encryptor.update(chunk))
+        
+        destination.write(encryptor.finalize() + encryptor.tag)
+        
+        return {
+            'iv': base64.b64encode(nonce).decode('utf-8'),
+            'size': size,
+            'algorithm': 'AES-256-GCM'
+        }
+    
     def decrypt_file(self, encrypted_content, encrypted_aes_key, iv, private_key_pem):
         """
         Decripteaza continutul unui fisier.
         
         Args:
-            encrypted_content: Continut criptat (base64)
+            encrypted_content: Continut criptat (bytes brut sau base64)
             encrypted_aes_key: Cheie AES criptata (base64)
             iv: Vector initializare (base64)
             private_key_pem: Cheia privata RSA
@@ -462,10 +813,16 @@ class CryptoService(ICryptoService):
         # Decriptam cheia AES
         aes_key = self.decrypt_with_rsa(encrypted_aes_key, private_key_pem)
         
-        # Decriptam continutul
-        ciphertext = base64.b64decode(encrypted_content)
+        # Decriptam continutul (fisierele noi sunt stocate brut, fara base64)
+        if isinstance(encrypted_content, (bytes, bytearray, memoryview)):
+            ciphertext = encrypted_content
+        else:
+            ciphertext = base64.b64decode(encrypted_content)
         iv_bytes = base64.b64decode(iv)
         
+        if len(iv_bytes) == self.AES_GCM_NONCE_SIZE:
+            return AESGCM(aes_key).decrypt(iv_bytes, bytes(ciphertext), None)
+        
         cipher = Cipher(
             algorithms.AES(aes_key),
             modes.CBC(iv_bytes),
@@ -478,6 +835,124 @@ class CryptoService(ICryptoService):
         unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
         return unpadder.update(padded_data) + unpadder.finalize()
     
+    def decrypt_stream(self, source, key, iv, chunk_size=None):
+        """
+        Decripteaza un flux AES-256-GCM sau AES-256-CBC bucata cu bucata (generator).
+        
+        Perechea lui encrypt_stream: plaintext-ul este produs pe masura ce
+        se citeste ciphertext-ul, fara a materializa tot fisierul in memorie.
+        Modul este dedus din lungimea IV-ului (12 bytes: GCM, 16 bytes: CBC).
+        
+        Args:
+            source: Obiect cu metoda read() care ofera ciphertext brut
+                    (pentru GCM trebuie sa permita si seek, tag-ul este la final)
+            key: Cheie AES (bytes)
+            iv: Vector de initializare (bytes)
+            chunk_size: Dimensiunea unei bucati citite (bytes) - optional
+            
+        Yields:
+            bytes: Bucati consecutive de plaintext
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        
+        if len(iv) == self.AES_GCM_NONCE_SIZE:
+            yield from self._decrypt_stream_gcm(source, key, iv, chunk_size)
+            return
+        
+        cipher = Cipher(
+            algorithms.AES(key),
+            modes.CBC(iv),
+            backend=self.backend
+        )
+        decryptor = cipher.decryptor()
+        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+        
+        while True:
+            chunk = source.read(chunk_size)
+            if not chunk:
+                break
+            data = unpadder.update(decryptor.update(chunk))
+            if data:
+                yield data
+        
+        yield unpadder.update(decryptor.finalize()) + unpadder.finalize()
+    
+    def verify_stream(self, source, key, iv, chunk_size=None):
+        """
+        Verifica un flux criptat inainte ca decrypt_stream sa trimita plaintext.
+        
+        decrypt_stream produce bucati inainte de verificarea tag-ului GCM (la
+        finalize), deci un fisier modificat ar fi trimis partial, cu status 200.
+        Rutele apeleaza intai aceasta metoda si raspund cu eroare daca esueaza.
+        
+        - GCM: o trecere completa de decriptare, fara pastrarea rezultatului
+          (memorie O(bucata)); tag-ul este verificat la final.
+        - CBC (neautentificat): doar dimensiunea si padding-ul ultimului bloc.
+        
+        Pozitia sursei este readusa la inceput.
+        
+        Raises:
+            InvalidTag: Tag GCM invalid (fisier modificat sau cheie gresita)
+            ValueError: Ciphertext CBC cu dimensiune sau padding invalid
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
+        
+        if len(iv) == self.AES_GCM_NONCE_SIZE:
+            for _ in self._decrypt_stream_gcm(source, key, iv, chunk_size):
+                pass
+            source.seek(0)
+            return
+        
+        block_size = algorithms.AES.block_size // 8
+        size = source.seek(0, os.SEEK_END)
+        if size == 0 or size % block_size:
+            raise ValueError('Dimensiunea ciphertext-ului nu este multiplu de bloc')
+        
+        # Ultimul bloc se decripteaza cu penultimul bloc drept IV (sau IV-ul, daca e unicul)
+        if size >= 2 * block_size:
+            source.seek(size - 2 * block_size)
+            previous = source.read(block_size)
+        else:
+            source.seek(0)
+            previous = iv
+        last = source.read(block_size)
+        source.seek(0)
+        
+        decryptor = Cipher(algorithms.AES(key), modes.CBC(previous), backend=self.backend).decryptor()
+        unpadder = padding.PKCS7(algorithms.AES.block_size).unpadder()
+        unpadder.update(decryptor.update(last) + decryptor.finalize())
+        unpadder.finalize()
+    
+    def _decrypt_stream_gcm(self, source, key, nonce, chunk_size):
+        """
+        Decriptare GCM in flux: tag-ul (ultimii 16 bytes) este citit intai,
+        apoi ciphertext-ul bucata cu bucata. Tag-ul este verificat abia la
+        finalize(), dupa ce bucatile au fost produse - InvalidTag apare la
+        finalul fluxului, deci apelantii care trimit datele mai departe
+        verifica intai fisierul cu verify_stream.
+        """
+        source.seek(-self.AES_GCM_TAG_SIZE, os.SEEK_END)
+        tag = source.read(self.AES_GCM_TAG_SIZE)
+        remaining = source.tell() - self.AES_GCM_TAG_SIZE
+        source.seek(0)
+        
+        decryptor = Cipher(
+            algorithms.AES(key),
+            modes.GCM(nonce, tag),
+            backend=self.backend
+        ).decryptor()
+        
+        while remaining > 0:
+            chunk = source.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield decryptor.update(chunk)
+        
+        final = decryptor.finalize()
+        if final:
+            yield final
+    
     # ==================== UTILITARE ====================
     
     def get_encryption_info(self):
@@ -490,13 +965,15 @@ class CryptoService(ICryptoService):
         """
         return {
             'symmetric': {
-                'algorithm': 'AES-256-CBC',
+                'algorithm': 'AES-256-GCM',
+                'file_algorithm': 'AES-256-GCM',
                 'key_size_bits': 256,
                 'block_size_bits': 128,
                 'description_ro': (
                     'AES (Advanced Encryption Standard) este un algoritm de criptare '
                     'simetrica, adica foloseste aceeasi cheie pentru criptare si decriptare. '
-                    'Modul CBC (Cipher Block Chaining) adauga securitate prin inlantuirea blocurilor.'
+                    'Mesajele si fisierele folosesc modul GCM (Galois/Counter Mode), care '
+                    'autentifica ciphertext-ul; datele vechi folosesc modul CBC (Cipher Block Chaining).'
                 )
             },
             'asymmetric': {
@@ -515,5 +992,16 @@ class CryptoService(ICryptoService):
                     'viteza AES pentru date mari si securitatea RSA pentru schimbul de chei. '
                     'Fiecare mesaj are o cheie AES unica, criptata cu RSA pentru fiecare destinatar.'
                 )
+            },
+            'backend': {
+                # AES trece prin interfata EVP a OpenSSL, care foloseste AES-NI/VAES
+                # cand procesorul le suporta (verificare: openssl speed -evp aes-256-cbc)
+                'library': self.backend.openssl_version_text(),
+                'interface': 'OpenSSL EVP',
+                'cpu_aes_instructions': cpu_has_aes_instructions()
             }
         }
+
+
+# Rezerva globala de chei RSA; thread-ul de umplere porneste la prima inregistrare
+rsa_key_pool = RsaKeyPool(CryptoService.RSA_KEY_SIZE)
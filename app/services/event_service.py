@@ -0,0 +1,139 @@
+# services/event_service.py
+# Notificari in timp real catre clienti (Server-Sent Events)
+# Inlocuieste polling-ul: clientul reincarca datele doar cand primeste un eveniment
+#
+# Backend: Redis pub/sub daca REDIS_URL este configurat si pachetul redis este
+# instalat (evenimentele ajung la toate procesele), altfel distributie in procesul curent.
+
+import json
+import queue
+import threading
+from config import Config
+
+try:
+    import redis
+except ImportError:  # pragma: no cover - redis este optional
+    redis = None
+
+
+class _LocalBroker:
+    """
+    Distributie a evenimentelor intre thread-urile procesului curent.
+    Fiecare abonat are propria coada; publish copiaza evenimentul in toate.
+    """
+    
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+    
+    def publish(self, channel, data):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait(data)
+            except queue.Full:
+                # Abonat blocat - evenimentul se pierde, clientul se resincronizeaza la reconectare
+                pass
+    
+    def listen(self, channel, timeout):
+        subscriber = queue.Queue(maxsize=100)
+        with self._lock:
+            self._subscribers.setdefault(channel, set()).add(subscriber)
+        try:
+            while True:
+                try:
+                    yield subscriber.get(timeout=timeout)
+                except queue.Empty:
+                    yield None
+        finally:
+            with self._lock:
+                subscribers = self._subscribers.get(channel)
+                if subscribers is not None:
+                    subscribers.discard(subscriber)
+                    if not subscribers:
+                        del self._subscribers[channel]
+
+
+class _RedisBroker:
+    """Distributie a evenimentelor prin Redis pub/sub (comuna tuturor proceselor)."""
+    
+    def __init__(self, client):
+        self.client = client
+    
+    def publish(self, channel, data):
+        self.client.publish(channel, data)
+    
+    def listen(self, channel, timeout):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(channel)
+        try:
+            while True:
+                message = pubsub.get_message(timeout=timeout)
+                yield message['data'].decode('utf-8') if message else None
+        finally:
+            pubsub.close()
+
+
+class EventService:
+    """
+    Publica evenimente per utilizator si le livreaza conexiunilor SSE deschise.
+    
+    Evenimentele sunt mici notificari ({'type': 'message', 'conversation_id': 1, ...}),
+    fara continut - clientul cere apoi datele prin API-ul obisnuit, care
+    raspunde din cache sau cu 304. Erorile Redis la publicare sunt ignorate:
+    clientii fara evenimente revin la polling.
+    """
+    
+    HEARTBEAT_INTERVAL = 15  # Secunde intre comentariile keep-alive
+    
+    def __init__(self, url=None):
+        """
+        Args:
+            url: URL Redis (implicit Config.REDIS_URL); fara URL, distributie in proces
+        """
+        url = url if url is not None else Config.REDIS_URL
+        if url and redis is not None:
+            self.broker = _RedisBroker(redis.Redis.from_url(url))
+            self._errors = (redis.RedisError,)
+        else:
+            self.broker = _LocalBroker()
+            self._errors = ()
+    
+    @staticmethod
+    def _channel(user_id):
+        return f'events:{user_id}'
+    
+    def publish(self, user_ids, event_type, **data):
+        """
+        Trimite un eveniment catre toti utilizatorii dati.
+        
+        Args:
+            user_ids: ID-urile destinatarilor
+            event_type: Tipul evenimentului (message, read, conversation)
+            **data: Campuri suplimentare (ex: conversation_id)
+        """
+        payload = json.dumps({'type': event_type, **data}, separators=(',', ':'))
+        for user_id in set(user_ids):
+            try:
+                self.broker.publish(self._channel(user_id), payload)
+            except self._errors:
+                pass
+    
+    def stream(self, user_id):
+        """
+        Generator cu fragmentele text/event-stream pentru un utilizator.
+        
+        Emite un comentariu keep-alive cand nu exista evenimente, astfel incat
+        conexiunile inchise de client sunt detectate si eliberate.
+        """
+        yield 'retry: 5000\n\n'
+        for payload in self.broker.listen(self._channel(user_id), self.HEARTBEAT_INTERVAL):
+            if payload is None:
+                yield ': keep-alive\n\n'
+            else:
+                yield f'data: {payload}\n\n'
+
+
+# Instanta comuna rutelor si ChatService
+event_service = EventService()
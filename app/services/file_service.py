@@ -9,11 +9,78 @@
 import os
 import uuid
 import mimetypes
+from io import BytesIO
 from werkzeug.utils import secure_filename
 from config import Config
+from fast_codecs import base64
 from .crypto_service import CryptoService
 
 
+# Alfabetul base64 - folosit pentru a recunoaste fisierele vechi,
+# salvate ca text base64 inainte de stocarea bruta a ciphertext-ului
+_BASE64_ALPHABET = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/=\r\n')
+
+
+def _read_ciphertext(full_path):
+    """
+    Citeste ciphertext-ul unui fisier stocat (bytes bruti).
+    
+    Fisierele vechi erau salvate base64; le recunoastem dupa continut
+    (ciphertext-ul brut contine practic mereu bytes din afara alfabetului
+    base64) si le decodam transparent.
+    """
+    with open(full_path, 'rb') as f:
+        data = f.read()
+    
+    if data and _BASE64_ALPHABET.issuperset(data):
+        return base64.b64decode(data)
+    return data
+
+
+def _is_base64_file(full_path):
+    """Recunoaste fisierele vechi (ciphertext salvat base64) dupa primii bytes."""
+    with open(full_path, 'rb') as f:
+        head = f.read(4096)
+    return bool(head) and _BASE64_ALPHABET.issuperset(head)
+
+
+def _open_ciphertext(full_path):
+    """
+    Deschide ciphertext-ul unui fisier stocat pentru citire in flux.
+    
+    Fisierele vechi (base64) sunt recunoscute dupa primii bytes si
+    decodate integral in memorie; cele noi sunt citite direct de pe disc.
+    """
+    f = open(full_path, 'rb')
+    head = f.read(4096)
+    if head and _BASE64_ALPHABET.issuperset(head):
+        f.close()
+        return BytesIO(_read_ciphertext(full_path))
+    f.seek(0)
+    return f
+
+
+def b64encode_chunks(chunks):
+    """
+    Codifica base64 un flux de bucati de bytes, pe masura ce sosesc.
+    
+    Bytes-ii ramasi (mai putin de 3) sunt pastrati pana la bucata urmatoare,
+    astfel incat concatenarea rezultatelor este base64-ul valid al intregului flux.
+    
+    Yields:
+        bytes: Bucati consecutive de base64 (ASCII)
+    """
+    pending = b''
+    for chunk in chunks:
+        data = pending + chunk
+        cut = len(data) - len(data) % 3
+        pending = data[cut:]
+        if cut:
+            yield base64.b64encode(data[:cut])
+    if pending:
+        yield base64.b64encode(pending)
+
+
 class FileService:
     """
     Serviciu pentru gestionarea fisierelor criptate.
@@ -95,7 +162,28 @@ class FileService:
         else:
             return 'other'
     
-    def upload_file(self, file, recipient_public_keys):
+    def create_message_key(self, recipient_public_keys):
+        """
+        Genereaza o cheie AES pentru toate fisierele unui upload si o
+        cripteaza RSA o singura data pentru fiecare destinatar.
+        
+        Fisierele sunt criptate cu AES-GCM, fiecare cu propriul nonce
+        aleatoriu, deci pot folosi aceeasi cheie; numarul de operatii RSA
+        scade de la fisiere x participanti la participanti.
+        
+        Args:
+            recipient_public_keys: Dict {user_id: public_key_pem}
+            
+        Returns:
+            dict: {'aes_key': bytes, 'encrypted_aes_keys': {user_id: cheie criptata}}
+        """
+        aes_key = self.crypto_service.generate_aes_key()
+        return {
+            'aes_key': aes_key,
+            'encrypted_aes_keys': self.crypto_service.wrap_aes_key(aes_key, recipient_public_keys)
+        }
+    
+    def upload_file(self, file, recipient_public_keys, message_key=None):
         """
         Uploadeaza si cripteaza un fisier.
         
@@ -105,9 +193,17 @@ class FileService:
         3. Cripteaza cu AES+RSA
         4. Salveaza fisierul criptat
         
+        Dimensiunea (Config.MAX_UPLOAD_BYTES) este verificata de ruta de upload
+        inainte de criptare, pentru toate fisierele cererii.
+        
+        Ruleaza in thread-urile de criptare ale rutei (doar cu contextul
+        aplicatiei): nu foloseste request sau session, totul vine ca argument.
+        
         Args:
             file: Obiect fisier (din request.files)
             recipient_public_keys: Dict {user_id: public_key_pem}
+            message_key: Rezultatul create_message_key, comun fisierelor
+                         aceluiasi upload (optional; altfel cheie noua per fisier)
             
         Returns:
             dict: {
@@ -127,27 +223,23 @@ class FileService:
             if not filename:
                 return {'success': False, 'error': 'Nume fisier invalid'}
         
+        # Generam un nume unic pentru fisierul criptat
+        unique_id = str(uuid.uuid4())
+        encrypted_filename = f"{unique_id}.enc"
+        file_path = os.path.join(self.upload_folder, encrypted_filename)
+        
         try:
-            # Citim continutul fisierului
-            file_data = file.read()
-            file_size = len(file_data)
-            
-            # Verificam dimensiunea (max 16MB)
-            max_size = 16 * 1024 * 1024
-            if file_size > max_size:
-                return {'success': False, 'error': 'Fisierul este prea mare (max 16MB)'}
+            # Cheia AES (criptata RSA pentru fiecare destinatar) - comuna upload-ului sau noua
+            if message_key is None:
+                message_key = self.create_message_key(recipient_public_keys)
+            aes_key = message_key['aes_key']
+            encrypted_aes_keys = message_key['encrypted_aes_keys']
             
-            # Criptam fisierul
-            encrypted_data = self.crypto_service.encrypt_file(file_data, recipient_public_keys)
-            
-            # Generam un nume unic pentru fisierul criptat
-            unique_id = str(uuid.uuid4())
-            encrypted_filename = f"{unique_id}.enc"
-            file_path = os.path.join(self.upload_folder, encrypted_filename)
-            
-            # Salvam fisierul criptat (base64 encoded)
-            with open(file_path, 'w') as f:
-                f.write(encrypted_data['encrypted_content'])
+            # Criptam fisierul in flux, direct din stream-ul uploadat in fisierul
+            # de pe disc (ciphertext brut), fara a-l citi integral in memorie
+            with open(file_path, 'wb') as f:
+                encrypted_data = self.crypto_service.encrypt_stream(file.stream, f, aes_key)
+            file_size = encrypted_data['size']
             
             # Determinam tipul si MIME type
             file_type = self.get_file_type(filename)
@@ -164,10 +256,11 @@ class FileService:
                 },
                 'temp_id': unique_id,
                 'iv': encrypted_data['iv'],
-                'encrypted_aes_keys': encrypted_data['encrypted_aes_keys']
+                'encrypted_aes_keys': encrypted_aes_keys
             }
             
         except Exception as e:
+            self.delete_file(encrypted_filename)
             return {'success': False, 'error': f'Eroare la upload: {str(e)}'}
     
     def delete_temp_file(self, temp_id):
@@ -201,7 +294,6 @@ class FileService:
             }
         """
         try:
-            import base64
             
             # Generam ID unic pentru fisier
             unique_id = str(uuid.uuid4())
@@ -249,9 +341,8 @@ class FileService:
             return {'success': False, 'error': 'Fisier negasit'}
         
         try:
-            # Citim fisierul criptat
-            with open(full_path, 'r') as f:
-                encrypted_content = f.read()
+            # Citim fisierul criptat (bytes bruti)
+            encrypted_content = _read_ciphertext(full_path)
             
             # Decriptam
             decrypted_data = self.crypto_service.decrypt_file(
@@ -269,6 +360,78 @@ class FileService:
         except Exception as e:
             return {'success': False, 'error': f'Eroare la decriptare fisier: {str(e)}'}
     
+    def stream_decrypted_file(self, file_path, encrypted_aes_key, iv, private_key_pem):
+        """
+        Decripteaza un fisier in flux, fara a-l incarca integral in memorie.
+        
+        Cheia AES este decriptata si fisierul verificat (tag-ul GCM, printr-o
+        trecere fara pastrarea rezultatului) imediat, deci cheile gresite si
+        fisierele modificate sunt raportate inainte de a incepe raspunsul;
+        continutul este decriptat pe masura ce generatorul este consumat.
+        
+        Args:
+            file_path: Calea fisierului criptat
+            encrypted_aes_key: Cheia AES criptata cu RSA
+            iv: Vector initializare
+            private_key_pem: Cheia privata RSA
+            
+        Returns:
+            dict: {
+                'success': bool,
+                'stream': generator de bucati decriptate (bytes) sau None,
+                'error': mesaj eroare sau None
+            }
+        """
+        full_path = os.path.join(self.upload_folder, file_path)
+        
+        if not os.path.exists(full_path):
+            return {'success': False, 'error': 'Fisier negasit'}
+        
+        try:
+            aes_key = self.crypto_service.decrypt_with_rsa(encrypted_aes_key, private_key_pem)
+            iv_bytes = base64.b64decode(iv)
+        except Exception as e:
+            return {'success': False, 'error': f'Eroare la decriptare fisier: {str(e)}'}
+        
+        source = _open_ciphertext(full_path)
+        try:
+            self.crypto_service.verify_stream(source, aes_key, iv_bytes)
+        except Exception:
+            source.close()
+            return {
+                'success': False,
+                'error': 'Eroare la decriptare fisier: fisierul a fost modificat sau cheia este gresita'
+            }
+        
+        def chunks():
+            with source:
+                yield from self.crypto_service.decrypt_stream(source, aes_key, iv_bytes)
+        
+        return {
+            'success': True,
+            'stream': chunks()
+        }
+    
+    def get_raw_encrypted_path(self, file_path):
+        """
+        Calea absoluta a unui fisier criptat care poate fi trimis ca atare
+        (send_file / sendfile), fara a-l citi in Python.
+        
+        Args:
+            file_path: Calea fisierului criptat
+            
+        Returns:
+            str: Calea pe disc, sau None daca fisierul lipseste ori este in
+                 formatul vechi base64 (care trebuie decodat inainte)
+        """
+        full_path = os.path.join(self.upload_folder, file_path)
+        try:
+            if _is_base64_file(full_path):
+                return None
+        except OSError:
+            return None
+        return full_path
+    
     def get_encrypted_file(self, file_path):
         """
         Obtine continutul criptat al unui fisier (pentru decriptare client-side).
@@ -290,13 +453,8 @@ class FileService:
             return {'success': False, 'error': 'Fisier negasit'}
         
         try:
-            # Citim fisierul criptat (este base64 encoded)
-            with open(full_path, 'r') as f:
-                encrypted_content_base64 = f.read()
-            
-            # Decodam din base64 pentru a obtine bytes-ii criptati
-            import base64
-            encrypted_bytes = base64.b64decode(encrypted_content_base64)
+            # Citim bytes-ii criptati (fisierele vechi base64 sunt decodate transparent)
+            encrypted_bytes = _read_ciphertext(full_path)
             
             return {
                 'success': True,
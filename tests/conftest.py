@@ -0,0 +1,65 @@
+# tests/conftest.py
+# Fixture-uri comune pentru testele API (Flask test_client)
+
+import os
+import sys
+from types import SimpleNamespace
+import itertools
+import tempfile
+import pytest
+
+# Baza de date si fisierele uploadate ale testelor stau intr-un director temporar.
+# Config citeste DATA_DIR la import, deci variabila se seteaza inainte de import
+os.environ['DATA_DIR'] = tempfile.mkdtemp(prefix='securechat-tests-')
+os.environ.pop('REDIS_URL', None)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from app import app as flask_app  # noqa: E402
+
+_user_numbers = itertools.count(1)
+
+
+@pytest.fixture(scope='session')
+def app():
+    """Aplicatia Flask (o singura instanta, ca in productie)."""
+    flask_app.config['TESTING'] = True
+    return flask_app
+
+
+@pytest.fixture
+def register(app):
+    """
+    Inregistreaza un utilizator nou pe un test_client dat (sesiunea ramane
+    in cookie-urile clientului) si returneaza raspunsul JSON.
+    """
+    def _register(client):
+        number = next(_user_numbers)
+        response = client.post('/api/auth/register', json={
+            'username': f'utilizator{number}',
+            'email': f'utilizator{number}@example.com',
+            'password': 'parola-test'
+        })
+        assert response.status_code == 201, response.get_data(as_text=True)
+        return response.get_json()
+    return _register
+
+
+@pytest.fixture
+def conversation(app, register):
+    """
+    Doi utilizatori (fiecare cu propriul test_client) si o conversatie 1-la-1 intre ei.
+    
+    Returns:
+        SimpleNamespace: alice/bob (clienti), alice_user/bob_user (raspunsul
+        de inregistrare, cu cheia privata) si id (ID-ul conversatiei)
+    """
+    alice, bob = app.test_client(), app.test_client()
+    alice_user, bob_user = register(alice), register(bob)
+    
+    response = alice.post('/api/conversations', json={'participant_ids': [bob_user['user']['id']]})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    return SimpleNamespace(
+        alice=alice, bob=bob,
+        alice_user=alice_user, bob_user=bob_user,
+        id=response.get_json()['conversation']['id']
+    )
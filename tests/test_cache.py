@@ -0,0 +1,84 @@
+# tests/test_cache.py
+# Teste pentru invalidarea cache-ului de conversatii si mesaje necitite
+
+
+def conversations_by_id(client):
+    response = client.get('/api/conversations')
+    assert response.status_code == 200
+    return {c['id']: c for c in response.get_json()['conversations']}
+
+
+def test_unread_count_and_list_follow_new_messages(conversation):
+    bob = conversation.bob
+    
+    # Raspunsurile sunt puse in cache inainte de mesaj
+    assert bob.get('/api/unread-count').get_json()['unread_count'] == 0
+    assert conversations_by_id(bob)[conversation.id]['unread_count'] == 0
+    
+    response = conversation.alice.post(
+        f'/api/conversations/{conversation.id}/messages', json={'content': 'Mesaj nou'}
+    )
+    assert response.status_code == 201
+    
+    assert bob.get('/api/unread-count').get_json()['unread_count'] == 1
+    listed = conversations_by_id(bob)[conversation.id]
+    assert listed['unread_count'] == 1
+    assert listed['last_message']['sender_id'] == conversation.alice_user['user']['id']
+    
+    assert bob.put(f'/api/conversations/{conversation.id}/read').status_code == 200
+    assert bob.get('/api/unread-count').get_json()['unread_count'] == 0
+    assert conversations_by_id(bob)[conversation.id]['unread_count'] == 0
+
+
+def test_new_conversation_appears_in_cached_list(app, register, conversation):
+    carol = app.test_client()
+    carol_id = register(carol)['user']['id']
+    assert set(conversations_by_id(carol)) == set()
+    
+    response = conversation.alice.post('/api/conversations', json={'participant_ids': [carol_id]})
+    assert response.status_code == 201
+    
+    assert set(conversations_by_id(carol)) == {response.get_json()['conversation']['id']}
+    assert len(conversations_by_id(conversation.alice)) == 2
+
+
+def test_cached_conversation_blobs_are_invalidated_per_conversation(app, register, conversation):
+    bob = conversation.bob
+    carol = app.test_client()
+    register(carol)
+    response = carol.post('/api/conversations', json={
+        'participant_ids': [conversation.bob_user['user']['id']]
+    })
+    assert response.status_code == 201
+    other_id = response.get_json()['conversation']['id']
+    
+    # Ambele conversatii serializate ajung in cache
+    assert set(conversations_by_id(bob)) == {conversation.id, other_id}
+    
+    response = carol.post(f'/api/conversations/{other_id}/messages', json={'content': 'Salut Bob'})
+    assert response.status_code == 201
+    listed = conversations_by_id(bob)
+    assert listed[other_id]['unread_count'] == 1
+    assert listed[other_id]['last_message'] is not None
+    assert listed[conversation.id]['unread_count'] == 0
+    assert listed[conversation.id]['last_message'] is None
+    
+    assert bob.put(f'/api/conversations/{other_id}/read').status_code == 200
+    assert conversations_by_id(bob)[other_id]['unread_count'] == 0
+    
+    assert bob.delete(f'/api/conversations/{other_id}').status_code == 200
+    assert set(conversations_by_id(bob)) == {conversation.id}
+
+
+def test_profile_change_invalidates_partner_conversations(conversation):
+    bob = conversation.bob
+    alice_id = conversation.alice_user['user']['id']
+    
+    def alice_color():
+        participants = conversations_by_id(bob)[conversation.id]['participants']
+        return next(p['avatar_color'] for p in participants if p['id'] == alice_id)
+    
+    assert alice_color() != '#654321'
+    response = conversation.alice.put('/api/auth/profile', json={'avatar_color': '#654321'})
+    assert response.status_code == 200
+    assert alice_color() == '#654321'
@@ -0,0 +1,42 @@
+# tests/test_conversations.py
+# Teste pentru rutele de conversatii
+
+
+def test_public_keys_are_keyed_by_user_id(conversation):
+    """Cheile publice sunt indexate dupa ID-ul utilizatorului (cheie JSON string)."""
+    response = conversation.alice.get(f'/api/conversations/{conversation.id}/public-keys')
+    
+    assert response.status_code == 200
+    public_keys = response.get_json()['public_keys']
+    assert set(public_keys) == {
+        str(conversation.alice_user['user']['id']),
+        str(conversation.bob_user['user']['id'])
+    }
+    assert all(key.startswith('-----BEGIN PUBLIC KEY-----') for key in public_keys.values())
+
+
+def test_conversations_with_same_timestamp_are_ordered_by_id(app, register, conversation):
+    from datetime import datetime
+    from models import db, Conversation
+    
+    others = [app.test_client() for _ in range(2)]
+    conversation_ids = [conversation.id]
+    for other in others:
+        register(other)
+        response = other.post('/api/conversations', json={
+            'participant_ids': [conversation.bob_user['user']['id']]
+        })
+        assert response.status_code == 201
+        conversation_ids.append(response.get_json()['conversation']['id'])
+    
+    # CURRENT_TIMESTAMP are rezolutie de o secunda: simulam trei conversatii in aceeasi secunda
+    with app.app_context():
+        db.session.execute(
+            db.update(Conversation)
+            .where(Conversation.id.in_(conversation_ids))
+            .values(updated_at=datetime(2024, 1, 1, 12, 0, 0))
+        )
+        db.session.commit()
+    
+    response = conversation.bob.get('/api/conversations')
+    assert [c['id'] for c in response.get_json()['conversations']] == sorted(conversation_ids, reverse=True)
@@ -0,0 +1,42 @@
+# tests/test_events.py
+# Teste pentru fluxul Server-Sent Events (/api/events)
+
+import json
+from services.event_service import event_service
+
+
+def test_events_stream_notifies_new_messages(conversation, monkeypatch):
+    # Interval scurt: primul keep-alive confirma abonarea la canal
+    monkeypatch.setattr(event_service, 'HEARTBEAT_INTERVAL', 0.05)
+    
+    response = conversation.bob.get('/api/events')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+    
+    chunks = iter(response.response)
+    try:
+        assert next(chunks) == b'retry: 5000\n\n'
+        assert next(chunks) == b': keep-alive\n\n'
+        
+        sent = conversation.alice.post(
+            f'/api/conversations/{conversation.id}/messages', json={'content': 'Salut'}
+        )
+        assert sent.status_code == 201
+        
+        chunk = next(chunks)
+        while chunk == b': keep-alive\n\n':
+            chunk = next(chunks)
+        assert chunk.startswith(b'data: ')
+        event = json.loads(chunk[len(b'data: '):])
+        assert event == {
+            'type': 'message',
+            'conversation_id': conversation.id,
+            'sender_id': conversation.alice_user['user']['id']
+        }
+    finally:
+        response.close()
+
+
+def test_events_require_login(app):
+    assert app.test_client().get('/api/events').status_code == 401
@@ -0,0 +1,164 @@
+# tests/test_files.py
+# Teste pentru upload-ul si descarcarea fisierelor criptate
+
+import os
+import base64
+from io import BytesIO
+from config import Config
+
+CONTENT = os.urandom(200 * 1024)
+
+
+def send_file_message(conversation, content=CONTENT, file_name='date.bin'):
+    """Uploadeaza un fisier, il trimite ca mesaj si returneaza atasamentul (dict)."""
+    response = conversation.alice.post(
+        f'/api/files/upload/{conversation.id}',
+        data={'files': (BytesIO(content), file_name)},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 201, response.get_data(as_text=True)
+    uploaded_files = response.get_json()['uploaded_files']
+    
+    response = conversation.alice.post(f'/api/files/send/{conversation.id}', json={
+        'content': '',
+        'attachments': uploaded_files
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    attachment = response.get_json()['message']['attachments'][0]
+    return attachment, uploaded_files[0]['encrypted_path']
+
+
+def test_download_decrypts_for_recipient(conversation):
+    attachment, _ = send_file_message(conversation)
+    
+    response = conversation.bob.post(f'/api/files/download/{attachment["id"]}', json={
+        'private_key': conversation.bob_user['private_key']
+    })
+    
+    assert response.status_code == 200
+    assert response.get_data() == CONTENT
+
+
+def test_download_rejects_modified_file(conversation):
+    """Un fisier GCM modificat este respins inainte de a trimite plaintext."""
+    attachment, encrypted_path = send_file_message(conversation)
+    full_path = os.path.join(Config.UPLOAD_FOLDER, encrypted_path)
+    with open(full_path, 'r+b') as f:
+        f.seek(1000)
+        byte = f.read(1)
+        f.seek(1000)
+        f.write(bytes([byte[0] ^ 1]))
+    
+    response = conversation.bob.post(f'/api/files/download/{attachment["id"]}', json={
+        'private_key': conversation.bob_user['private_key']
+    })
+    
+    assert response.status_code == 400
+    assert CONTENT[:1000] not in response.get_data()
+
+
+def test_raw_image_is_served_as_binary(conversation):
+    image = b'\x89PNG\r\n\x1a\n' + os.urandom(4096)
+    attachment, _ = send_file_message(conversation, image, 'poza.png')
+    body = {'private_key': conversation.bob_user['private_key']}
+    
+    response = conversation.bob.post(f'/api/files/image/{attachment["id"]}/raw', json=body)
+    assert response.status_code == 200
+    assert response.mimetype == 'image/png'
+    assert response.headers['Cache-Control'] == 'no-store'
+    assert response.get_data() == image
+    
+    # Varianta base64 ramane disponibila
+    response = conversation.bob.post(f'/api/files/image/{attachment["id"]}', json=body)
+    assert response.get_json()['image_data'].startswith('data:image/png;base64,')
+
+
+def test_raw_image_rejects_other_files(conversation):
+    attachment, _ = send_file_message(conversation)
+    response = conversation.bob.post(f'/api/files/image/{attachment["id"]}/raw', json={
+        'private_key': conversation.bob_user['private_key']
+    })
+    assert response.status_code == 400
+
+
+def test_encrypted_file_is_served_from_disk_with_etag(conversation):
+    attachment, encrypted_path = send_file_message(conversation)
+    with open(os.path.join(Config.UPLOAD_FOLDER, encrypted_path), 'rb') as f:
+        ciphertext = f.read()
+    url = f'/api/files/encrypted/{attachment["id"]}'
+    
+    response = conversation.bob.get(url)
+    assert response.status_code == 200
+    assert response.get_data() == ciphertext
+    assert response.headers['Content-Length'] == str(len(ciphertext))
+    assert 'private' in response.headers['Cache-Control']
+    etag = response.headers['ETag']
+    
+    response = conversation.bob.get(url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+
+
+def test_upload_over_limit_is_rejected_before_encryption(conversation, monkeypatch):
+    monkeypatch.setattr(Config, 'MAX_UPLOAD_BYTES', 64 * 1024)
+    
+    response = conversation.alice.post(
+        f'/api/files/upload/{conversation.id}',
+        data={'files': (BytesIO(CONTENT), 'date.bin')},
+        content_type='multipart/form-data'
+    )
+    
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+    
+    # Un fisier de exact MAX_UPLOAD_BYTES este acceptat (antetele multipart nu se numara)
+    response = conversation.alice.post(
+        f'/api/files/upload/{conversation.id}',
+        data={'files': (BytesIO(CONTENT[:64 * 1024]), 'date.bin')},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 201
+
+
+def test_request_over_max_content_length_returns_json(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'MAX_CONTENT_LENGTH', 1024)
+    
+    response = app.test_client().post('/api/auth/login', json={'username': 'x' * 2048})
+    
+    assert response.status_code == 413
+    assert 'error' in response.get_json()
+
+
+def test_encrypted_file_answers_range_requests(conversation):
+    attachment, encrypted_path = send_file_message(conversation)
+    full_path = os.path.join(Config.UPLOAD_FOLDER, encrypted_path)
+    with open(full_path, 'rb') as f:
+        ciphertext = f.read()
+    url = f'/api/files/encrypted/{attachment["id"]}'
+    
+    response = conversation.bob.get(url, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(ciphertext)}'
+    assert response.get_data() == ciphertext[100:200]
+    
+    # Formatul vechi (base64 pe disc) raspunde la fel, din memorie
+    with open(full_path, 'wb') as f:
+        f.write(base64.b64encode(ciphertext))
+    response = conversation.bob.get(url, headers={'Range': 'bytes=100-199'})
+    assert response.status_code == 206
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(ciphertext)}'
+    assert response.get_data() == ciphertext[100:200]
+
+
+def test_upload_encrypts_multiple_files_in_order(conversation):
+    contents = [os.urandom(1024 * (n + 1)) for n in range(3)]
+    response = conversation.alice.post(
+        f'/api/files/upload/{conversation.id}',
+        data={'files': [(BytesIO(content), f'fisier{n}.bin') for n, content in enumerate(contents)]},
+        content_type='multipart/form-data'
+    )
+    
+    assert response.status_code == 201, response.get_data(as_text=True)
+    uploaded_files = response.get_json()['uploaded_files']
+    assert [f['name'] for f in uploaded_files] == ['fisier0.bin', 'fisier1.bin', 'fisier2.bin']
+    assert [f['size'] for f in uploaded_files] == [len(content) for content in contents]
@@ -0,0 +1,102 @@
+# tests/test_messages.py
+# Teste pentru rutele de mesaje
+
+
+def send_messages(conversation, *contents):
+    """Alice trimite mesajele date (criptate pe server); returneaza ID-urile lor."""
+    message_ids = []
+    for content in contents:
+        response = conversation.alice.post(
+            f'/api/conversations/{conversation.id}/messages', json={'content': content}
+        )
+        assert response.status_code == 201, response.get_data(as_text=True)
+        message_ids.append(response.get_json()['message']['id'])
+    return message_ids
+
+
+def test_decrypt_batch_keeps_request_order(conversation):
+    message_ids = send_messages(conversation, 'unu', 'doi', 'trei')
+    
+    response = conversation.bob.post('/api/messages/decrypt-batch', json={
+        'message_ids': [message_ids[2], 999999, message_ids[0], message_ids[1]],
+        'private_key': conversation.bob_user['private_key']
+    })
+    
+    assert response.status_code == 200
+    results = response.get_json()['results']
+    assert [r['message_id'] for r in results] == [message_ids[2], 999999, message_ids[0], message_ids[1]]
+    assert [r.get('content') for r in results if r['success']] == ['trei', 'unu', 'doi']
+    assert results[1]['success'] is False
+
+
+def test_decrypt_batch_denies_other_users(app, register, conversation):
+    message_ids = send_messages(conversation, 'secret')
+    mallory = app.test_client()
+    mallory_user = register(mallory)
+    
+    response = mallory.post('/api/messages/decrypt-batch', json={
+        'message_ids': message_ids,
+        'private_key': mallory_user['private_key']
+    })
+    
+    assert response.status_code == 200
+    result = response.get_json()['results'][0]
+    assert result['success'] is False
+    assert 'content' not in result or result['content'] is None
+
+
+def test_decrypt_batch_validates_request(conversation):
+    bob = conversation.bob
+    private_key = conversation.bob_user['private_key']
+    
+    assert bob.post('/api/messages/decrypt-batch', json={'message_ids': [1]}).status_code == 400
+    assert bob.post('/api/messages/decrypt-batch', json={
+        'message_ids': [], 'private_key': private_key
+    }).status_code == 400
+    assert bob.post('/api/messages/decrypt-batch', json={
+        'message_ids': list(range(1, 102)), 'private_key': private_key
+    }).status_code == 400
+    assert bob.post('/api/messages/decrypt-batch', json={
+        'message_ids': ['x'], 'private_key': private_key
+    }).status_code == 400
+
+
+def test_messages_page_has_more_and_next_before(conversation):
+    message_ids = send_messages(conversation, 'unu', 'doi', 'trei')
+    url = f'/api/conversations/{conversation.id}/messages'
+    
+    first = conversation.bob.get(url + '?limit=2', buffered=True).get_json()
+    assert [m['id'] for m in first['messages']] == message_ids[1:]
+    assert first['has_more'] is True
+    assert first['next_before'] == message_ids[1]
+    
+    second = conversation.bob.get(f"{url}?limit=2&before={first['next_before']}", buffered=True).get_json()
+    assert [m['id'] for m in second['messages']] == message_ids[:1]
+    assert second['has_more'] is False
+    assert second['next_before'] is None
+    
+    # Ultima pagina cu exact limit mesaje nu mai raporteaza has_more
+    exact = conversation.bob.get(f'{url}?limit=3', buffered=True).get_json()
+    assert exact['has_more'] is False
+
+
+def test_oversized_messages_are_rejected(conversation):
+    from config import Config
+    url = f'/api/conversations/{conversation.id}/messages'
+    
+    too_long = 'a' * (Config.MAX_MESSAGE_BYTES + 1)
+    assert conversation.alice.post(url, json={'content': too_long}).status_code == 413
+    
+    # Corpul peste MAX_MESSAGE_REQUEST_BYTES este respins dupa Content-Length
+    body = 'x' * (Config.MAX_MESSAGE_REQUEST_BYTES + 1)
+    response = conversation.alice.post(url, data=body, content_type='application/json')
+    assert response.status_code == 413
+    response = conversation.alice.post(url + '/encrypted', data=body, content_type='application/json')
+    assert response.status_code == 413
+    
+    response = conversation.alice.post(url + '/encrypted', json={
+        'encrypted_content': 'A' * (Config.MAX_ENCRYPTED_MESSAGE_CHARS + 4),
+        'iv': 'AAAAAAAAAAAAAAAA',
+        'encrypted_aes_keys': {str(conversation.alice_user['user']['id']): 'AAAA'}
+    })
+    assert response.status_code == 413
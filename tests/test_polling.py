@@ -0,0 +1,90 @@
+# tests/test_polling.py
+# Teste pentru raspunsurile conditionate (ETag / 304) ale rutelor de polling
+
+
+def poll(client, url, etag=None):
+    headers = {'If-None-Match': etag} if etag else {}
+    # buffered: raspunsurile in flux (stream_with_context) sunt consumate imediat
+    return client.get(url, headers=headers, buffered=True)
+
+
+def send(conversation, content='Salut'):
+    response = conversation.alice.post(
+        f'/api/conversations/{conversation.id}/messages', json={'content': content}
+    )
+    assert response.status_code == 201
+
+
+def test_conversations_poll_returns_304_until_change(conversation):
+    bob = conversation.bob
+    response = poll(bob, '/api/conversations')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert 'no-cache' in response.headers['Cache-Control']
+    
+    response = poll(bob, '/api/conversations', etag)
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    
+    send(conversation)
+    response = poll(bob, '/api/conversations', etag)
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_messages_poll_returns_304_until_new_message(conversation):
+    bob = conversation.bob
+    url = f'/api/conversations/{conversation.id}/messages'
+    send(conversation, 'primul')
+    
+    response = poll(bob, url)
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert poll(bob, url, etag).status_code == 304
+    
+    # Alta pagina (alti parametri) nu refoloseste ETag-ul
+    assert poll(bob, url + '?limit=1', etag).status_code == 200
+    
+    send(conversation, 'al doilea')
+    response = poll(bob, url, etag)
+    assert response.status_code == 200
+    assert len(response.get_json()['messages']) == 2
+
+
+def test_messages_poll_changes_when_sender_profile_changes(conversation):
+    bob = conversation.bob
+    url = f'/api/conversations/{conversation.id}/messages'
+    send(conversation)
+    etag = poll(bob, url).headers['ETag']
+    
+    response = conversation.alice.put('/api/auth/profile', json={'avatar_color': '#123456'})
+    assert response.status_code == 200
+    
+    response = poll(bob, url, etag)
+    assert response.status_code == 200
+    assert response.get_json()['messages'][0]['sender_avatar_color'] == '#123456'
+
+
+def test_messages_etag_is_not_shared_with_outsiders(app, register, conversation):
+    url = f'/api/conversations/{conversation.id}/messages'
+    send(conversation)
+    etag = poll(conversation.bob, url).headers['ETag']
+    
+    mallory = app.test_client()
+    register(mallory)
+    assert poll(mallory, url, etag).status_code != 304
+
+
+def test_poll_rate_limit_is_per_user(conversation):
+    from config import Config
+    allowed = int(Config.POLL_RATE_LIMIT.split('/')[0])
+    alice, bob = conversation.alice, conversation.bob
+    
+    for _ in range(allowed):
+        assert alice.get('/api/unread-count').status_code == 200
+    
+    response = alice.get('/api/unread-count')
+    assert response.status_code == 429
+    assert 'error' in response.get_json()
+    # Contorul este per utilizator: Bob nu este afectat
+    assert bob.get('/api/unread-count').status_code == 200
@@ -0,0 +1,90 @@
+# tests/test_smoke.py
+# Fluxul complet prin API: inregistrare -> login -> conversatie -> mesaje -> fisiere
+
+from io import BytesIO
+
+
+def test_health(app):
+    response = app.test_client().get('/api/health')
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'healthy'
+
+
+def test_chat_flow(app, register):
+    alice, bob = app.test_client(), app.test_client()
+    alice_user = register(alice)
+    bob_user = register(bob)
+    
+    # Login dintr-o sesiune noua
+    bob = app.test_client()
+    response = bob.post('/api/auth/login', json={
+        'username': bob_user['user']['username'],
+        'password': 'parola-test'
+    })
+    assert response.status_code == 200
+    assert bob.get('/api/auth/me').status_code == 200
+    
+    # Conversatie 1-la-1; a doua cerere o returneaza pe cea existenta
+    response = alice.post('/api/conversations', json={'participant_ids': [bob_user['user']['id']]})
+    assert response.status_code == 201
+    conversation_id = response.get_json()['conversation']['id']
+    response = alice.post('/api/conversations', json={'participant_ids': [bob_user['user']['id']]})
+    assert response.status_code == 200
+    assert response.get_json()['conversation']['id'] == conversation_id
+    
+    response = alice.get(f'/api/conversations/{conversation_id}/public-keys')
+    assert response.status_code == 200
+    assert len(response.get_json()['public_keys']) == 2
+    
+    # Mesaj criptat pe server, citit si decriptat de destinatar
+    response = alice.post(f'/api/conversations/{conversation_id}/messages', json={'content': 'Salut, Bob!'})
+    assert response.status_code == 201, response.get_data(as_text=True)
+    
+    assert bob.get('/api/unread-count').get_json()['unread_count'] == 1
+    conversations = bob.get('/api/conversations').get_json()['conversations']
+    assert [c['id'] for c in conversations] == [conversation_id]
+    
+    response = bob.get(f'/api/conversations/{conversation_id}/messages')
+    assert response.status_code == 200
+    messages = response.get_json()['messages']
+    assert len(messages) == 1
+    assert messages[0]['sender_username'] == alice_user['user']['username']
+    
+    response = bob.post(f'/api/messages/{messages[0]["id"]}/decrypt', json={
+        'private_key': bob_user['private_key']
+    })
+    assert response.status_code == 200
+    assert response.get_json()['content'] == 'Salut, Bob!'
+    
+    assert bob.put(f'/api/conversations/{conversation_id}/read').status_code == 200
+    assert bob.get('/api/unread-count').get_json()['unread_count'] == 0
+    
+    # Fisier: upload, trimitere ca mesaj, descarcare decriptata de destinatar
+    response = alice.post(
+        f'/api/files/upload/{conversation_id}',
+        data={'files': (BytesIO(b'continut fisier'), 'notite.txt')},
+        content_type='multipart/form-data'
+    )
+    assert response.status_code == 201, response.get_data(as_text=True)
+    response = alice.post(f'/api/files/send/{conversation_id}', json={
+        'content': 'Vezi fisierul',
+        'attachments': response.get_json()['uploaded_files']
+    })
+    assert response.status_code == 201, response.get_data(as_text=True)
+    attachment_id = response.get_json()['message']['attachments'][0]['id']
+    
+    response = bob.get(f'/api/files/meta/{attachment_id}')
+    assert response.status_code == 200
+    assert response.get_json()['file_name'] == 'notite.txt'
+    
+    response = bob.post(f'/api/files/download/{attachment_id}', json={
+        'private_key': bob_user['private_key']
+    })
+    assert response.status_code == 200
+    assert response.get_data() == b'continut fisier'
+    
+    # Un utilizator din afara conversatiei nu are acces
+    mallory = app.test_client()
+    register(mallory)
+    assert mallory.get(f'/api/conversations/{conversation_id}/public-keys').status_code == 404
+    assert mallory.get(f'/api/files/meta/{attachment_id}').status_code == 403
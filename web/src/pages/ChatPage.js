@@ -41,13 +41,18 @@ function ChatPage() {
   // Referinta pentru polling
   const pollingRef = useRef(null);
   
+  // Cat timp fluxul de evenimente (SSE) este conectat, polling-ul este suspendat
+  const eventsConnectedRef = useRef(false);
+  const conversationIdRef = useRef(conversationId);
+  conversationIdRef.current = conversationId;
+  
   // Incarcam conversatiile la montare
   useEffect(() => {
     loadConversations();
     
-    // Polling pentru conversatii noi (la fiecare 5 secunde)
+    // Polling pentru conversatii noi (la fiecare 5 secunde), doar fara SSE
     pollingRef.current = setInterval(() => {
-      loadConversations(true);
+      if (!eventsConnectedRef.current) loadConversations(true);
     }, 5000);
     
     return () => {
@@ -57,15 +62,42 @@ function ChatPage() {
     };
   }, []);
   
+  // Notificari in timp real: reincarcam datele doar cand serverul anunta o schimbare
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+    
+    const events = new EventSource('/api/events', { withCredentials: true });
+    events.onopen = () => {
+      eventsConnectedRef.current = true;
+    };
+    events.onerror = () => {
+      // EventSource se reconecteaza singur; intre timp revenim la polling
+      eventsConnectedRef.current = false;
+    };
+    events.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      const currentId = conversationIdRef.current;
+      if (data.type === 'message' && currentId && String(data.conversation_id) === String(currentId)) {
+        loadMessages(currentId, true);
+      }
+      loadConversations(true);
+    };
+    
+    return () => {
+      eventsConnectedRef.current = false;
+      events.close();
+    };
+  }, []);
+  
   // Incarcam mesajele cand se schimba conversatia
   useEffect(() => {
     if (conversationId) {
       loadConversation(conversationId);
       loadMessages(conversationId);
       
-      // Polling pentru mesaje noi
+      // Polling pentru mesaje noi, doar fara SSE
       const messagePolling = setInterval(() => {
-        loadMessages(conversationId, true);
+        if (!eventsConnectedRef.current) loadMessages(conversationId, true);
       }, 3000);
       
       return () => clearInterval(messagePolling);
@@ -108,6 +108,10 @@ export const chatAPI = {
   // Decripteaza un mesaj (pe server - pentru demo)
   decryptMessage: (messageId, privateKey) =>
     api.post(`/messages/${messageId}/decrypt`, { private_key: privateKey }),
+  
+  // Decripteaza mai multe mesaje intr-o singura cerere (pe server - pentru demo)
+  decryptMessagesBatch: (messageIds, privateKey) =>
+    api.post('/messages/decrypt-batch', { message_ids: messageIds, private_key: privateKey }),
 };
 
 // ==================== FISIERE ====================
@@ -174,6 +178,13 @@ export const fileAPI = {
   getImage: (attachmentId, privateKey) =>
     api.post(`/files/image/${attachmentId}`, { private_key: privateKey }),
   
+  // Obtine imagine decriptata ca binar (Blob, pentru URL.createObjectURL)
+  getImageRaw: (attachmentId, privateKey) =>
+    api.post(`/files/image/${attachmentId}/raw`,
+      { private_key: privateKey },
+      { responseType: 'blob' }
+    ),
+  
   // Sterge fisier temporar
   deleteTempFile: (tempId) => api.delete(`/files/delete-temp/${tempId}`),
   
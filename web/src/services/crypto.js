@@ -15,11 +15,22 @@
  * DECRIPTARE (server -> client):
  * 1. Importa cheia privata RSA din format PEM
  * 2. Decripteaza cheia AES cu RSA-OAEP
- * 3. Decripteaza continutul cu AES-CBC
+ * 3. Decripteaza continutul cu AES-GCM (mesaje criptate pe server)
+ *    sau AES-CBC (fisiere, mesaje vechi) - modul e dedus din lungimea IV-ului
  * 
  * Serverul nu poate decripta mesajele - E2E complet.
  */
 
+// Nonce AES-GCM (12 bytes); IV-urile AES-CBC au 16 bytes
+const AES_GCM_NONCE_BYTES = 12;
+
+/**
+ * Alege modul AES dupa lungimea IV-ului
+ */
+function aesAlgorithmForIV(ivBuffer) {
+  return ivBuffer.byteLength === AES_GCM_NONCE_BYTES ? 'AES-GCM' : 'AES-CBC';
+}
+
 // Converteste string PEM la ArrayBuffer
 function pemToArrayBuffer(pem) {
   const lines = pem.split('\n');
@@ -118,11 +129,11 @@ export class CryptoClient {
   /**
    * Importa o cheie AES din bytes (pentru decriptare)
    */
-  async importAESKey(keyBytes, usage = ['decrypt']) {
+  async importAESKey(keyBytes, usage = ['decrypt'], algorithm = 'AES-CBC') {
     return await window.crypto.subtle.importKey(
       'raw',
       keyBytes,
-      { name: 'AES-CBC' },
+      { name: algorithm },
       false,
       usage
     );
@@ -285,7 +296,7 @@ export class CryptoClient {
   }
   
   /**
-   * Decripteaza date cu AES-CBC (returneaza string)
+   * Decripteaza date cu AES-GCM sau AES-CBC, dupa algoritmul cheii (returneaza string)
    */
   async decryptAES(encryptedData, key, iv) {
     const encryptedBuffer = base64ToArrayBuffer(encryptedData);
@@ -293,7 +304,7 @@ export class CryptoClient {
     
     const decrypted = await window.crypto.subtle.decrypt(
       {
-        name: 'AES-CBC',
+        name: key.algorithm.name,
         iv: ivBuffer,
       },
       key,
@@ -304,13 +315,14 @@ export class CryptoClient {
   }
   
   /**
-   * Decripteaza date binare cu AES-CBC (pentru fisiere)
+   * Decripteaza date binare cu AES-GCM sau AES-CBC (pentru fisiere),
+   * dupa algoritmul cheii importate
    * Returneaza ArrayBuffer in loc de string
    */
   async decryptAESBinary(encryptedBuffer, key, ivBuffer) {
     const decrypted = await window.crypto.subtle.decrypt(
       {
-        name: 'AES-CBC',
+        name: key.algorithm.name,
         iv: ivBuffer,
       },
       key,
@@ -331,8 +343,9 @@ export class CryptoClient {
       // 2. Decriptam cheia AES cu RSA
       const aesKeyBytes = await this.decryptRSA(encryptedAESKey, privateKey);
       
-      // 3. Importam cheia AES
-      const aesKey = await this.importAESKey(aesKeyBytes);
+      // 3. Importam cheia AES pentru modul indicat de IV (GCM sau CBC)
+      const algorithm = aesAlgorithmForIV(base64ToArrayBuffer(iv));
+      const aesKey = await this.importAESKey(aesKeyBytes, ['decrypt'], algorithm);
       
       // 4. Decriptam mesajul cu AES
       const decrypted = await this.decryptAES(encryptedContent, aesKey, iv);
@@ -361,11 +374,12 @@ export class CryptoClient {
       // 2. Decriptam cheia AES cu RSA
       const aesKeyBytes = await this.decryptRSA(encryptedAESKey, privateKey);
       
-      // 3. Importam cheia AES
-      const aesKey = await this.importAESKey(aesKeyBytes);
+      // 3. Importam cheia AES pentru modul indicat de IV (GCM: fisiere criptate
+      //    pe server, ciphertext + tag; CBC: fisiere vechi si criptate pe client)
+      const ivBuffer = base64ToArrayBuffer(iv);
+      const aesKey = await this.importAESKey(aesKeyBytes, ['decrypt'], aesAlgorithmForIV(ivBuffer));
       
       // 4. Decriptam fisierul cu AES
-      const ivBuffer = base64ToArrayBuffer(iv);
       const decrypted = await this.decryptAESBinary(encryptedFileBuffer, aesKey, ivBuffer);
       
       return decrypted;